@@ -1,10 +1,69 @@
 import json
 import logging
+from ast import literal_eval
+from functools import lru_cache
+from html import escape
 from odoo import http
 from odoo.http import request, Response
+from ..utils import cached_fields_get
 
 _logger = logging.getLogger(__name__)
 
+# Maximum number of records returned by the /ovunque/search endpoint
+MAX_API_RESULTS = 50
+
+# HTML scaffold of the /ovunque/debug-fields page, filled with str.format()
+_DEBUG_FIELDS_PAGE = """
+<html>
+<head>
+    <style>
+        body {{ font-family: monospace; margin: 20px; }}
+        .section {{ margin: 20px 0; padding: 10px; border: 1px solid #ccc; }}
+        .stored {{ background: #e8f5e9; }}
+        .computed {{ background: #fff3e0; }}
+        table {{ width: 100%; border-collapse: collapse; }}
+        td, th {{ padding: 8px; text-align: left; border: 1px solid #ddd; }}
+        th {{ background: #f0f0f0; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <h2>Model: {model_name}</h2>
+    
+    <div class="section stored">
+        <h3>Stored Fields ({stored_count}) - USE ONLY THESE IN QUERIES</h3>
+        <table>
+            <tr><th>Field Name</th><th>Type</th><th>Label</th></tr>
+            {stored_rows}
+        </table>
+    </div>
+    
+    <div class="section computed">
+        <h3>Computed Fields ({computed_count}) - DO NOT USE</h3>
+        <table>
+            <tr><th>Field Name</th><th>Type</th></tr>
+            {computed_rows}
+        </table>
+    </div>
+</body>
+</html>
+"""
+
+# Table rows, formatted from (name, type, label, is_stored) tuples
+_STORED_FIELD_ROW = "<tr><td><code>{0}</code></td><td>{1}</td><td>{2}</td></tr>"
+_COMPUTED_FIELD_ROW = "<tr><td><code>{0}</code></td><td>{1}</td></tr>"
+
+
+@lru_cache(maxsize=1024)
+def _parse_domain(domain_text):
+    """
+    Parse a stored domain string into a tuple of clauses.
+    
+    Uses ast.literal_eval, which only accepts Python literals, so LLM-generated
+    text can never execute code. Results are memoized for repeated domains;
+    callers get an immutable tuple and should copy it into a list.
+    """
+    return tuple(literal_eval(domain_text))
+
 
 class SearchController(http.Controller):
     """
@@ -35,8 +94,8 @@ class SearchController(http.Controller):
         Response:
             {
                 "success": bool,
-                "results": list of {id, display_name},
-                "count": number,
+                "results": list of {id, display_name} (at most 50),
+                "count": total number of matching records,
                 "domain": generated Odoo domain as string,
                 "query_id": ID of created search.query record,
                 "error": error message if success=false
@@ -73,22 +132,40 @@ class SearchController(http.Controller):
             
             search_record.action_execute_search()
             
-            if search_record.status == 'success':
+            if search_record.status == 'success' and search_record.is_multi_model:
+                # Structured queries (aggregations, anti-joins) have no domain that can
+                # be re-run on model_name: return the result lines they stored instead
+                lines = search_record.result_ids.sorted('id')[:MAX_API_RESULTS]
+                results_data = [
+                    {'id': line.record_id, 'display_name': line.record_name}
+                    for line in lines
+                ]
+                
+                return {
+                    'success': True,
+                    'results': results_data,
+                    'count': search_record.results_count,
+                    'domain': search_record.model_domain,
+                    'query_id': search_record.id,
+                }
+            elif search_record.status == 'success':
                 Model = request.env[search_record.model_name]
-                domain = eval(search_record.model_domain)
-                results = Model.search(domain)
+                domain = list(_parse_domain(search_record.model_domain))
+                # Only the returned page is fetched; the total is a SELECT COUNT(*),
+                # needed only when the page is full
+                # search_read resolves all display names in one batch
+                rows = Model.search_read(domain, ['display_name'], limit=MAX_API_RESULTS)
+                total = Model.search_count(domain) if len(rows) == MAX_API_RESULTS else len(rows)
                 
-                results_data = []
-                for record in results[:50]:
-                    results_data.append({
-                        'id': record.id,
-                        'display_name': record.display_name,
-                    })
+                results_data = [
+                    {'id': row['id'], 'display_name': row['display_name']}
+                    for row in rows
+                ]
                 
                 return {
                     'success': True,
                     'results': results_data,
-                    'count': len(results),
+                    'count': total,
                     'domain': search_record.model_domain,
                     'query_id': search_record.id,
                 }
@@ -188,75 +265,31 @@ class SearchController(http.Controller):
                     'error': 'Missing model parameter'
                 }
             
-            Model = request.env[model_name]
-            model_fields = Model.fields_get()
-            
-            stored_fields = []
-            computed_fields = []
+            model_fields = cached_fields_get(request.env, model_name)
             
-            for field_name, field_data in sorted(model_fields.items()):
-                if field_name.startswith('_'):
-                    continue
-                
-                field_type = field_data.get('type', 'unknown')
-                field_string = field_data.get('string', field_name)
-                is_stored = field_data.get('store', True) is not False
-                
-                field_info = {
-                    'name': field_name,
-                    'type': field_type,
-                    'label': field_string,
-                }
-                
-                if is_stored:
-                    stored_fields.append(field_info)
-                else:
-                    computed_fields.append(field_info)
+            # One pass over the fields: (name, type, label, is_stored) rows, HTML-escaped
+            rows = [
+                (
+                    escape(field_name),
+                    escape(field_data.get('type', 'unknown')),
+                    escape(field_data.get('string', field_name)),
+                    field_data.get('store', True) is not False,
+                )
+                for field_name, field_data in sorted(model_fields.items())
+                if not field_name.startswith('_')
+            ]
+            stored_fields = [row for row in rows if row[3]]
+            computed_fields = [row for row in rows if not row[3]]
             
-            html = f"""
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: monospace; margin: 20px; }}
-                    .section {{ margin: 20px 0; padding: 10px; border: 1px solid #ccc; }}
-                    .stored {{ background: #e8f5e9; }}
-                    .computed {{ background: #fff3e0; }}
-                    table {{ width: 100%; border-collapse: collapse; }}
-                    td, th {{ padding: 8px; text-align: left; border: 1px solid #ddd; }}
-                    th {{ background: #f0f0f0; font-weight: bold; }}
-                </style>
-            </head>
-            <body>
-                <h2>Model: {model_name}</h2>
-                
-                <div class="section stored">
-                    <h3>Stored Fields ({len(stored_fields)}) - USE ONLY THESE IN QUERIES</h3>
-                    <table>
-                        <tr><th>Field Name</th><th>Type</th><th>Label</th></tr>
-            """
-            
-            for field in stored_fields:
-                html += f"<tr><td><code>{field['name']}</code></td><td>{field['type']}</td><td>{field['label']}</td></tr>"
-            
-            html += """
-                    </table>
-                </div>
-                
-                <div class="section computed">
-                    <h3>Computed Fields ({}) - DO NOT USE</h3>
-                    <table>
-                        <tr><th>Field Name</th><th>Type</th></tr>
-            """.format(len(computed_fields))
-            
-            for field in computed_fields[:50]:
-                html += f"<tr><td><code>{field['name']}</code></td><td>{field['type']}</td></tr>"
-            
-            html += """
-                    </table>
-                </div>
-            </body>
-            </html>
-            """
+            stored_rows = "".join(_STORED_FIELD_ROW.format(*row) for row in stored_fields)
+            computed_rows = "".join(_COMPUTED_FIELD_ROW.format(*row) for row in computed_fields[:50])
+            html = _DEBUG_FIELDS_PAGE.format(
+                model_name=escape(model_name),
+                stored_count=len(stored_fields),
+                stored_rows=stored_rows,
+                computed_count=len(computed_fields),
+                computed_rows=computed_rows,
+            )
             
             return Response(html, mimetype='text/html')
         except Exception as e:
@@ -1 +1,3 @@
 from . import search_query
+from . import search_query_cache
+from . import search_query_rate_limit
@@ -1,17 +1,679 @@
+import ast
+import functools
+import hashlib
 import logging
 import json
+import random
 import re
-from odoo import models, fields, api, _
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from operator import eq, ge, gt, le, lt
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
-from collections import Counter
+from collections import Counter, OrderedDict
+from ..utils import cached_fields_get, cached_model_text, cached_stored_field_names
+from .search_query_cache import _exact_key
 
 _logger = logging.getLogger(__name__)
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, APIConnectionError, APITimeoutError, AuthenticationError
+    import httpx
 except ImportError:
     _logger.warning("openai library not installed")
 
+try:
+    import h2  # noqa: F401 - optional, lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# OpenAI chat model used to translate queries
+LLM_MODEL = 'gpt-4o-mini'
+
+# Default number of OpenAI requests in flight when executing several queries
+# (override with the ovunque.llm_max_concurrency system parameter)
+LLM_MAX_CONCURRENCY = 8
+
+# Completion token budget per query: a JSON answer with a few clauses stays well
+# below it, and the budget is what the token rate limiter reserves per call
+LLM_MAX_TOKENS = 300
+
+# Seconds to wait for OpenAI to start answering, and attempts on transient errors
+LLM_TIMEOUT = 20.0
+LLM_MAX_ATTEMPTS = 3
+
+# OpenAI embedding model used by the semantic response cache
+EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# Maximum number of raw LLM responses kept in the per-process exact-match cache
+LLM_CACHE_SIZE = 4096
+
+# Maximum number of raw responses whose parsed domain list is memoized
+DOMAIN_PARSE_CACHE_SIZE = 512
+
+# Field attributes read from fields_get() for prompts and domain validation
+FIELD_ATTRIBUTES = ['type', 'string', 'store']
+
+# Prefix operators of an Odoo domain (not field clauses)
+DOMAIN_OPERATORS = frozenset({'|', '&', '!'})
+
+# Comparison operators accepted in a domain clause generated by the LLM
+CLAUSE_OPERATORS = frozenset({
+    '=', '!=', '>', '<', '>=', '<=',
+    'like', 'not like', 'ilike', 'not ilike', '=like', '=ilike',
+    'in', 'not in',
+})
+
+# Query-independent instructions, sent as the system message so that every
+# request shares the same prefix (eligible for OpenAI prompt caching)
+SYSTEM_PROMPT = """You are an intelligent Odoo query generator. Convert the natural language query in the last user message to an Odoo query (domain or structured format). Always respond with a single JSON object. No explanations, no markdown.
+
+===== DECISION TREE =====
+1. Is this a SIMPLE filter? (e.g., "active invoices", "clients from Milan")
+   → Respond with a JSON domain object: {"domain": [["field", "operator", value]]}
+
+2. Is this a COMPLEX query? (requires counting, aggregation, or exclusion)
+   Examples: "Clients with 10+ invoices", "Products never ordered"
+   → Respond with JSON metadata:
+   {"query_type": "count_aggregate", "primary_model": "res.partner", ...}
+
+===== SIMPLE DOMAIN RULES =====
+1. Respond with ONLY: {"domain": [[...], [...]]}
+2. Field names must EXACTLY match the available fields listed in the model information
+   (fields are grouped by type; a label in parentheses is not part of the name)
+3. Operators: '=', '!=', '>', '<', '>=', '<=', 'ilike', 'like', 'in', 'not in'
+4. Dates: YYYY-MM-DD format
+5. Numbers: plain integers/floats (100, not 100€)
+6. Booleans: true/false (JSON, no quotes)
+7. The field examples of the model use Odoo notation ('field', 'op', value); write each clause as a JSON array
+
+===== STRUCTURED QUERY RULES (Complex queries) =====
+Respond with JSON when query needs multi-model logic:
+
+PATTERN 1 - COUNT AGGREGATION: "Clients with 10+ invoices"
+{
+  "query_type": "count_aggregate",
+  "primary_model": "res.partner",
+  "secondary_model": "account.move",
+  "link_field": "partner_id",
+  "threshold": 10,
+  "comparison": ">="
+}
+
+PATTERN 2 - EXCLUSION: "Products never ordered"
+{
+  "query_type": "exclusion",
+  "primary_model": "product.template",
+  "secondary_model": "sale.order",
+  "link_field": "product_id"
+}
+
+===== RESPONSE EXAMPLES =====
+
+SIMPLE DOMAIN QUERIES:
+{"domain": [["state", "=", "confirmed"]]}
+{"domain": [["name", "ilike", "test"], ["active", "=", true]]}
+{"domain": [["amount_total", ">", 1000]]}
+{"domain": []}
+
+STRUCTURED QUERIES:
+{"query_type": "count_aggregate", "primary_model": "res.partner", "secondary_model": "account.move", "link_field": "partner_id", "threshold": 3, "comparison": ">="}
+{"query_type": "exclusion", "primary_model": "product.template", "secondary_model": "sale.order", "link_field": "product_id"}
+
+The response schema lists every key: set the keys you don't use to null.
+
+Analyze: Does the query need multi-model logic (counting, aggregation)?
+- YES → Respond ONLY with JSON (structured query)
+- NO → Respond ONLY with the domain object {"domain": [...]}"""
+
+# Per-model user message (cached per model) and per-query user message,
+# filled with str.format_map so only the variable parts are interpolated
+MODEL_CONTEXT_TEMPLATE = """===== MODEL INFORMATION =====
+Model: {model}
+Description: {description}
+
+===== AVAILABLE FIELDS (DATABASE STORED ONLY) =====
+{fields}
+
+===== FIELD EXAMPLES FOR THIS MODEL =====
+{examples}"""
+
+TASK_PROMPT_TEMPLATE = """===== YOUR TASK =====
+Query: "{query}"
+
+Response:"""
+
+BATCH_TASK_PROMPT_TEMPLATE = """===== YOUR TASK =====
+Answer each of these {count} queries independently:
+{queries}
+
+Respond with {{"results": [...]}}: exactly one answer object per query, in the same order.
+
+Response:"""
+
+# Structured outputs schema of the LLM answer (strict mode: every key is required,
+# unused keys are null). Simple queries fill "domain"; structured queries fill
+# query_type and its parameters and leave "domain" null.
+_DOMAIN_VALUE_SCHEMA = {
+    'anyOf': [
+        {'type': 'string'},
+        {'type': 'number'},
+        {'type': 'boolean'},
+        {'type': 'null'},
+        {'type': 'array', 'items': {'anyOf': [{'type': 'string'}, {'type': 'number'}]}},
+    ],
+}
+LLM_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'domain': {
+            'anyOf': [
+                {'type': 'null'},
+                {
+                    'type': 'array',
+                    'items': {
+                        'anyOf': [
+                            {'type': 'string', 'enum': ['|', '&', '!']},
+                            {'type': 'array', 'items': _DOMAIN_VALUE_SCHEMA},
+                        ],
+                    },
+                },
+            ],
+        },
+        'query_type': {'anyOf': [{'type': 'null'}, {'type': 'string', 'enum': ['count_aggregate', 'exclusion']}]},
+        'primary_model': {'type': ['string', 'null']},
+        'secondary_model': {'type': ['string', 'null']},
+        'link_field': {'type': ['string', 'null']},
+        'threshold': {'type': ['number', 'null']},
+        'comparison': {'anyOf': [{'type': 'null'}, {'type': 'string', 'enum': ['>=', '>', '=', '<', '<=']}]},
+    },
+    'required': ['domain', 'query_type', 'primary_model', 'secondary_model', 'link_field', 'threshold', 'comparison'],
+    'additionalProperties': False,
+}
+
+# response_format of a single query and of a batch of queries on the same model
+LLM_RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {'name': 'odoo_query', 'strict': True, 'schema': LLM_RESPONSE_SCHEMA},
+}
+LLM_BATCH_RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {
+        'name': 'odoo_query_batch',
+        'strict': True,
+        'schema': {
+            'type': 'object',
+            'properties': {'results': {'type': 'array', 'items': LLM_RESPONSE_SCHEMA}},
+            'required': ['results'],
+            'additionalProperties': False,
+        },
+    },
+}
+
+# Fields present on most models that users never search on; left out of the prompt
+# so the 50 listed fields are business fields
+NOISE_FIELDS = frozenset({
+    'create_uid', 'create_date', 'write_uid', 'write_date',
+    'message_ids', 'message_follower_ids', 'message_partner_ids',
+    'activity_ids', 'website_message_ids', 'rating_ids',
+})
+
+# Field types the LLM can filter on in a domain (binary, html, properties... are skipped)
+USEFUL_FIELD_TYPES = frozenset({
+    'char', 'text', 'selection', 'integer', 'float', 'monetary',
+    'date', 'datetime', 'boolean', 'many2one', 'many2many', 'one2many',
+})
+
+# Comparisons allowed in a count_aggregate query, applied to the per-record count
+COUNT_COMPARISONS = {'>=': ge, '>': gt, '<=': le, '<': lt, '=': eq}
+
+# Longest LLM response accepted for parsing (answers are capped by LLM_MAX_TOKENS;
+# anything much longer is runaway output, rejected before json/ast parse it)
+MAX_RESPONSE_CHARS = 8000
+
+# Maximum number of result lines stored per query (results_count keeps the full total)
+MAX_RESULTS = 500
+
+# Above this many old result lines, they are deleted with one SQL statement
+# instead of unlink(), which loads and processes every line in Python
+RESULTS_SQL_DELETE_THRESHOLD = 1000
+
+# Maximum number of queries answered by one batched completion
+LLM_BATCH_SIZE = 10
+
+_llm_response_cache = OrderedDict()
+_llm_response_cache_lock = threading.Lock()
+
+# Shared OpenAI clients keyed by API key; each keeps its connection pool warm
+_openai_clients = {}
+_openai_clients_lock = threading.Lock()
+
+
+def _get_openai_client(api_key):
+    """
+    Return the shared OpenAI client for api_key, creating it on first use.
+    
+    Reusing the client keeps keep-alive connections to api.openai.com open,
+    so repeated queries skip the TCP + TLS handshake. The underlying httpx
+    client is thread-safe, which the concurrent prefetch relies on; its pool
+    is sized for the prefetch, and when the h2 package is installed the
+    concurrent requests are multiplexed over one HTTP/2 connection.
+    """
+    with _openai_clients_lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            http_client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=30.0,
+            )
+            # Retries are handled by _call_llm, which also feeds the rate limiters
+            client = _openai_clients[api_key] = OpenAI(
+                api_key=api_key, http_client=http_client, max_retries=0,
+            )
+        return client
+
+
+def _evict_openai_client(api_key):
+    """
+    Drop and close the shared client of api_key (e.g. after the key was rejected).
+    
+    The next call builds a new client, so a revoked or replaced key doesn't
+    keep an idle connection pool alive for the life of the worker.
+    """
+    with _openai_clients_lock:
+        client = _openai_clients.pop(api_key, None)
+    if client is not None:
+        client.close()
+
+
+def _llm_cache_key(model, messages):
+    """
+    Build the exact-match cache key for an LLM request.
+    
+    The key is the SHA256 of the model name and the full message list,
+    so any change to the prompt (fields, examples, query text) is a miss.
+    """
+    payload = json.dumps({'m': model, 'p': messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _llm_cache_get(key):
+    """Return the cached response text for key (refreshing its LRU position), or None."""
+    with _llm_response_cache_lock:
+        response_text = _llm_response_cache.get(key)
+        if response_text is not None:
+            _llm_response_cache.move_to_end(key)
+        return response_text
+
+
+def _llm_cache_put(key, response_text):
+    """Store a response text, evicting the least recently used entry when full."""
+    with _llm_response_cache_lock:
+        _llm_response_cache[key] = response_text
+        _llm_response_cache.move_to_end(key)
+        while len(_llm_response_cache) > LLM_CACHE_SIZE:
+            _llm_response_cache.popitem(last=False)
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket shared by every OpenAI call of this process.
+    
+    Refills continuously at `per_minute` tokens per minute up to one minute of
+    capacity. acquire() blocks until enough tokens are available, so bursts
+    (e.g. the concurrent prefetch) are spread out instead of triggering 429
+    errors. A rate of 0 disables the limit.
+    """
+    
+    def __init__(self):
+        self.per_minute = 0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def configure(self, per_minute):
+        """Set the refill rate; a change restarts the bucket full."""
+        with self.lock:
+            if per_minute != self.per_minute:
+                self.per_minute = per_minute
+                self.tokens = float(per_minute)
+                self.updated = time.monotonic()
+    
+    def acquire(self, amount=1):
+        """
+        Take `amount` tokens, sleeping until they are available.
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                if not self.per_minute:
+                    return waited
+                now = time.monotonic()
+                rate = self.per_minute / 60.0
+                self.tokens = min(float(self.per_minute), self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                # A request larger than the capacity would otherwise wait forever
+                amount = min(amount, self.per_minute)
+                if now >= self.blocked_until and self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = max(self.blocked_until - now, (amount - self.tokens) / rate)
+            time.sleep(delay)
+            waited += delay
+    
+    def penalize(self, seconds):
+        """Block every acquire() for `seconds` (e.g. after a 429 Retry-After)."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+# Per-process limits on OpenAI requests and (estimated) tokens per minute,
+# configured from ovunque.llm_rpm / ovunque.llm_tpm (0 = unlimited)
+_llm_request_bucket = _TokenBucket()
+_llm_token_bucket = _TokenBucket()
+
+# Reserved search.query.rate.limit key of the database-wide request bucket
+LLM_RPM_STATE_KEY = 'ovunque.llm_rpm_state'
+
+
+class _SharedTokenBucket:
+    """
+    Token bucket shared by every Odoo worker of a database.
+    
+    The state (wall-clock seconds) lives in a search.query.rate.limit row,
+    not in a system parameter that admins could edit and whose ormcache raw
+    updates would bypass. Each attempt reads and updates the row under
+    SELECT ... FOR UPDATE in its own short transaction, so concurrent workers
+    take turns on the row; sleeping happens outside the lock. The cursor is
+    opened from the registry, so the bucket can be used from the prefetch
+    threads as well.
+    """
+    
+    def __init__(self, registry, key, per_minute):
+        self.registry = registry
+        self.key = key
+        self.per_minute = per_minute
+    
+    def acquire(self, amount=1):
+        """
+        Take `amount` tokens, sleeping until they are available.
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        # A request larger than the capacity would otherwise wait forever
+        amount = min(amount, self.per_minute)
+        while True:
+            delay = self._take(amount)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+    
+    def penalize(self, seconds):
+        """Block every worker's acquire() for `seconds` (e.g. after a 429 Retry-After)."""
+        with self.registry.cursor() as cr:
+            updated, tokens, blocked_until = self._lock_state(cr)
+            self._save_state(cr, updated, tokens, max(blocked_until, time.time() + seconds))
+    
+    def _take(self, amount):
+        """Take the tokens if available; otherwise return the seconds to wait."""
+        with self.registry.cursor() as cr:
+            updated, tokens, blocked_until = self._lock_state(cr)
+            now = time.time()
+            rate = self.per_minute / 60.0
+            tokens = min(float(self.per_minute), tokens + max(now - updated, 0.0) * rate)
+            if now >= blocked_until and tokens >= amount:
+                self._save_state(cr, now, tokens - amount, blocked_until)
+                return 0.0
+            self._save_state(cr, now, tokens, blocked_until)
+            return max(blocked_until - now, (amount - tokens) / rate)
+    
+    def _lock_state(self, cr):
+        """Lock the state row (creating it full) and return its values."""
+        cr.execute("""
+            INSERT INTO search_query_rate_limit (name, updated, tokens, blocked_until)
+            VALUES (%s, %s, %s, 0)
+            ON CONFLICT (name) DO NOTHING
+        """, (self.key, time.time(), float(self.per_minute)))
+        cr.execute("""
+            SELECT updated, tokens, blocked_until FROM search_query_rate_limit
+            WHERE name = %s FOR UPDATE
+        """, (self.key,))
+        updated, tokens, blocked_until = cr.fetchone()
+        return updated or 0.0, tokens or 0.0, blocked_until or 0.0
+    
+    def _save_state(self, cr, updated, tokens, blocked_until):
+        cr.execute(
+            "UPDATE search_query_rate_limit SET updated = %s, tokens = %s, blocked_until = %s WHERE name = %s",
+            (updated, tokens, blocked_until, self.key),
+        )
+
+
+class _BracketScanner:
+    """
+    Incrementally find the end of the first top-level [...] or {...} value.
+    
+    Fed with streamed text chunks, it tracks bracket depth and skips brackets
+    inside quoted strings (single or double quotes, with backslash escapes).
+    Text before the first opening bracket (e.g. a markdown fence) is ignored.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.quote = None
+        self.escaped = False
+    
+    def feed(self, text):
+        """
+        Scan the next chunk of text.
+        
+        Returns:
+            int: Index in text of the closing bracket of the first value,
+                 or -1 if the value is not complete yet
+        """
+        for index, char in enumerate(text):
+            if self.quote:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == self.quote:
+                    self.quote = None
+            elif char in '[{':
+                self.depth += 1
+            elif char in ']}':
+                if self.depth:
+                    self.depth -= 1
+                    if not self.depth:
+                        return index
+            elif self.depth and char in '"\'':
+                self.quote = char
+        return -1
+
+
+def _literal_domain(text):
+    """
+    Parse a domain list literal.
+    
+    JSON-style lists ([["state", "=", "draft"]], true/false/null) are read by
+    json.loads, which is much faster than ast.literal_eval and also accepts
+    the JSON literals literal_eval rejects; Python-style lists (tuples,
+    single quotes, True/None) fail json.loads on the first characters and
+    go to ast.literal_eval. No quote or keyword rewriting is done, since it
+    would corrupt values such as "O'Brien" or "True Blue".
+    
+    Raises:
+        ValueError, SyntaxError: If the text is neither JSON nor a Python literal
+    """
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
+    if isinstance(value, list):
+        value = [tuple(item) if isinstance(item, list) else item for item in value]
+    return value
+
+
+@functools.lru_cache(maxsize=DOMAIN_PARSE_CACHE_SIZE)
+def _parse_domain_text(text):
+    """
+    Extract and parse the domain list of a raw LLM response (memoized).
+    
+    Only the pure text processing is cached (list extraction, json/literal
+    parsing), keyed by the response text; price fixes and field validation
+    depend on the query and the installed models and run on every call.
+    
+    Returns:
+        tuple: Parsed domain elements, empty when the response holds no list
+        
+    Raises:
+        ValueError, SyntaxError: If the list is not a valid literal (repairable)
+        TypeError: If the literal is not a list
+    """
+    cleaned = text.strip()
+    
+    # Common answer when no filter can be inferred: no scan or parse needed
+    if cleaned in ('[]', '[ ]'):
+        return ()
+    
+    extracted = _extract_list(cleaned)
+    if extracted is not None:
+        cleaned = extracted
+    if not cleaned or cleaned == '[]':
+        return ()
+    
+    domain = _literal_domain(cleaned)
+    if not isinstance(domain, list):
+        raise TypeError(f"Response is not a list: {type(domain)}")
+    return tuple(domain)
+
+
+# Domain repairs: mixed quote pairs ('" or "') and trailing commas before ] or )
+_MIXED_QUOTES_RE = re.compile(r"""'"|"'""")
+_TRAILING_COMMA_RE = re.compile(r',\s*([\]\)])')
+
+
+def _extract_list(text):
+    """
+    Return the first balanced [...] list in text, or None if there is none.
+    
+    One linear scan with _BracketScanner (quote-aware), instead of fence
+    stripping regexes plus a backtracking DOTALL regex search. Surrounding text,
+    including markdown code fences, is ignored. An unterminated list is
+    returned up to the end of the text so that the repair step can try it.
+    """
+    start = text.find('[')
+    if start < 0:
+        return None
+    end = _BracketScanner().feed(text[start:])
+    if end < 0:
+        return text[start:]
+    return text[start:start + end + 1]
+
+
+# Short description of each supported model, included in the LLM prompt
+_MODEL_DESCRIPTIONS = {
+    'res.partner': 'Contacts, Customers, Suppliers, Companies',
+    'account.move': 'Invoices and Bills (posted documents)',
+    'product.product': 'Product Variants (specific SKUs with combinations)',
+    'product.template': 'Product Templates (prices, costs, inventory by template)',
+    'sale.order': 'Sales Orders',
+    'purchase.order': 'Purchase Orders',
+    'stock.move': 'Stock Movements and Inventory',
+    'crm.lead': 'CRM Leads and Opportunities',
+    'project.task': 'Project Tasks and Work Items',
+}
+
+# Posted customer invoices not (fully) paid yet. Shared by the "unpaid invoices"
+# fast path and the account.move prompt example, so the same records are
+# returned whether or not the query goes to the LLM
+_UNPAID_INVOICES_DOMAIN = (
+    ('move_type', '=', 'out_invoice'),
+    ('state', '=', 'posted'),
+    ('payment_state', 'in', ['not_paid', 'partial']),
+)
+
+# Model-specific query → domain examples, included in the LLM prompt
+_MODEL_EXAMPLES = {
+    'res.partner': """
+- "Customers from Milan" → [('city', 'ilike', 'Milan'), ('customer_rank', '>', 0)]
+- "Suppliers" → [('supplier_rank', '>', 0)]
+- "Active contacts" → [('active', '=', True)]
+- "Inactive partners" → [('active', '=', False)]""",
+    'account.move': f"""
+- "Unpaid invoices" → {list(_UNPAID_INVOICES_DOMAIN)}
+- "Invoices from January 2025" → [('invoice_date', '>=', '2025-01-01'), ('invoice_date', '<', '2025-02-01')]
+- "Large invoices over 1000" → [('amount_total', '>', 1000)]""",
+    'product.product': """
+- "Variants with barcode starting with 123" → [('barcode', 'like', '123')]
+- "Active variants" → [('active', '=', True)]
+- "Variants with default_code starting with SKU" → [('default_code', 'like', 'SKU')]
+NOTE: For price/cost queries, use product.template model instead (prices are stored there)""",
+    'product.template': """
+IMPORTANT PRICE DISTINCTION:
+- list_price = SELLING PRICE (what customer pays) - for queries about "price", "prezzo", "cost to customer"
+- standard_price = INTERNAL COST (our cost) - only for "internal cost", "costo interno", "cost price"
+
+EXAMPLES:
+- "Products under 100 euros" → [('list_price', '<', 100)]
+- "Articles cheaper than 50" → [('list_price', '<', 50)]
+- "Products with selling price under 100" → [('list_price', '<', 100)]
+- "Products with internal cost > 50" → [('standard_price', '>', 50)]
+- "Products with our cost above 100" → [('standard_price', '>', 100)]
+- "Active products" → [('active', '=', True)]
+- "Low stock products" → [('qty_available', '<', 10), ('active', '=', True)]
+- "Electronics products" → [('categ_id.name', 'ilike', 'Electronics')]
+
+KEY RULE: If user mentions "price", "prezzo", "euro", "cost to customer" → ALWAYS use list_price
+KEY RULE: If user specifically mentions "internal cost", "costo interno", "our cost", "cost price" → use standard_price""",
+    'sale.order': """
+- "Draft orders" → [('state', '=', 'draft')]
+- "Confirmed sales from last month" → [('state', '=', 'sale')]
+- "Orders over 500" → [('amount_total', '>', 500)]""",
+    'purchase.order': """
+- "RFQ pending" → [('state', '=', 'draft')]
+- "Confirmed purchases" → [('state', 'in', ['purchase', 'done'])]""",
+    'stock.move': """
+- "In progress moves" → [('state', '=', 'confirmed')]
+- "Done moves" → [('state', '=', 'done')]""",
+    'crm.lead': """
+- "Open opportunities" → [('probability', '>', 0), ('probability', '<', 100)]
+- "Lost deals" → [('probability', '=', 0)]
+- "Won deals" → [('probability', '=', 100)]""",
+    'project.task': """
+- "Open tasks" → [('state', 'in', ['todo', 'in_progress'])]
+- "Completed tasks" → [('state', '=', 'done')]""",
+}
+
+# Canonical queries answered without the LLM, per model: (pattern, domain).
+# Patterns are matched against the whole lowercased query, spaces collapsed
+# and trailing punctuation removed.
+_FAST_PATHS = {
+    'res.partner': [
+        (re.compile(r'(all )?(customers|clienti)|(tutti i )?clienti'), (('customer_rank', '>', 0),)),
+        (re.compile(r'(all )?(suppliers|vendors)|(tutti i )?fornitori'), (('supplier_rank', '>', 0),)),
+        (re.compile(r'(all )?(contacts|partners)|(tutti i )?(contatti|partner)'), ()),
+    ],
+    'account.move': [
+        (re.compile(r'unpaid (customer )?invoices|fatture (clienti )?non pagate'), _UNPAID_INVOICES_DOMAIN),
+        (re.compile(r'draft invoices|fatture in bozza'), (('move_type', '=', 'out_invoice'), ('state', '=', 'draft'))),
+    ],
+    'sale.order': [
+        (re.compile(r'draft (sale )?orders|quotations|preventivi|ordini in bozza'), (('state', '=', 'draft'),)),
+        (re.compile(r'confirmed (sale )?orders|ordini confermati'), (('state', '=', 'sale'),)),
+    ],
+}
+
 
 class SearchQuery(models.Model):
     """
@@ -33,7 +695,7 @@ class SearchQuery(models.Model):
     - _execute_structured_query(): Routes to count_aggregate or exclusion execution
     - _execute_count_aggregate_from_spec(): Counts related records with threshold filtering
     - _execute_exclusion_from_spec(): Finds records NOT present in related model
-    - _build_prompt(): Constructs detailed prompt with model info and examples
+    - _build_llm_messages(): System rules, model schema and query as separate messages
     """
     _name = 'search.query'
     _description = 'Natural Language Search Query'
@@ -72,6 +734,22 @@ class SearchQuery(models.Model):
         'projects': ['project.task'],
     }
     
+    # Query keywords used by _fix_price_fields to tell selling price questions
+    # from internal cost questions (matched as case-insensitive substrings of the query)
+    PRICE_KEYWORDS = frozenset({
+        'prezzo', 'price', 'euro', '€', 'under', 'sopra', 'above', 'below',
+        'less', 'more', 'cheaper', 'expensive',
+    })
+    COST_KEYWORDS = frozenset({
+        'costo interno', 'internal cost', 'cost price', 'nostra cost', 'our cost',
+    })
+    # Same keywords as one case-insensitive alternation each: a single scan of the query
+    PRICE_KEYWORDS_RE = re.compile('|'.join(map(re.escape, sorted(PRICE_KEYWORDS))), re.IGNORECASE)
+    COST_KEYWORDS_RE = re.compile('|'.join(map(re.escape, sorted(COST_KEYWORDS))), re.IGNORECASE)
+    
+    # Domain fields _fix_price_fields may rewrite or reject
+    PRICE_FIELDS = frozenset({'standard_price', 'list_price'})
+    
     # The natural language query text entered by the user (e.g., "unpaid invoices over 1000")
     # Can be in Italian, English, or mixed
     name = fields.Char('Query Text', required=True)
@@ -93,6 +771,10 @@ class SearchQuery(models.Model):
     # Used for field introspection and ORM operations
     model_name = fields.Selection(AVAILABLE_MODELS, 'Modello Specifico', readonly=True)
     
+    # SHA256 of model name + normalized query text (same key as search.query.cache)
+    # Indexed so an earlier successful run of the same query is found without a scan
+    query_hash = fields.Char('Query Hash', compute='_compute_query_hash', store=True, index=True)
+    
     # Generated Odoo domain as a string (e.g., "[('state', '=', 'draft')]")
     # For simple queries: produced by GPT-4 domain parsing
     # For structured queries: represents the final filtered IDs as a domain comment
@@ -103,6 +785,9 @@ class SearchQuery(models.Model):
     # Updated after search is executed
     results_count = fields.Integer('Results Count')
     
+    # When set, only results_count is computed (SELECT COUNT(*)): no result lines are stored
+    count_only = fields.Boolean('Count Only', default=False)
+    
     # Raw response text from OpenAI API (stored for debugging)
     # Contains either a Odoo domain list or JSON structured query spec
     # Helpful for troubleshooting when the LLM doesn't generate valid queries
@@ -111,12 +796,21 @@ class SearchQuery(models.Model):
     # One2many relationship to SearchResult records
     # Contains all the records found by the search domain or structured query
     # Records are linked via query_id in the search.result model
-    result_ids = fields.One2many('search.result', 'query_id', 'Results')
+    # At most MAX_RESULTS lines are stored; results_count keeps the full total
+    result_ids = fields.One2many(
+        'search.result', 'query_id', 'Results',
+        help="Matching records, limited to the first 500 (see Results Count for the total)",
+    )
     
-    # Status of the query: 'draft' = initial, 'success' = completed, 'error' = failed
+    # Notice shown above the results when the list is truncated at MAX_RESULTS
+    results_note = fields.Char('Results Note', compute='_compute_results_note')
+    
+    # Status of the query: 'draft' = initial, 'queued' = waiting for the background job,
+    # 'success' = completed, 'error' = failed
     # Updated after action_execute_search() is called
     status = fields.Selection([
         ('draft', 'Draft'),
+        ('queued', 'Queued'),
         ('success', 'Success'),
         ('error', 'Error'),
     ], default='draft')
@@ -160,12 +854,28 @@ class SearchQuery(models.Model):
     # Currently always False (not used in v2.0, reserved for future extensions)
     used_sql_fallback = fields.Boolean('Used SQL Fallback', default=False, readonly=True)
 
+    @api.depends('name', 'model_name')
+    def _compute_query_hash(self):
+        for record in self:
+            record.query_hash = _exact_key(record.model_name or '', record.name or '')
+
+    @api.depends('results_count', 'count_only')
+    def _compute_results_note(self):
+        for record in self:
+            if not record.count_only and record.results_count > MAX_RESULTS:
+                record.results_note = _(
+                    'Showing the first %s of %s results. Refine the query to narrow them down.'
+                ) % (MAX_RESULTS, record.results_count)
+            else:
+                record.results_note = False
+
     def action_execute_search(self):
         """
         Main execution method for natural language search.
         
         Flow:
-        1. Delete any previous results for this query
+        1. Delete any previous results for these queries (one batch, or per
+           query when the batch fails so errors stay on the affected query)
         2. Validate category/model selection
         3. Parse natural language to Odoo domain or structured query using LLM
         4. Detect query type: simple domain vs. structured (count_aggregate, exclusion)
@@ -173,42 +883,258 @@ class SearchQuery(models.Model):
         6. Execute the search
         7. Store results in search.result records
         8. Update status (success/error) and error messages
+        
+        When several queries are executed together, their LLM calls are issued
+        concurrently first (see _prefetch_llm_responses) and each record is then
+        processed sequentially with its response already available.
         """
+        llm_responses = self._prefetch_llm_responses() if len(self) > 1 else {}
+        try:
+            with self.env.cr.savepoint():
+                self._clear_results()
+            cleared = True
+        except Exception as e:
+            # e.g. AccessError on some result lines: clear them query by query
+            # below, so only the affected queries end in error
+            _logger.warning(f"Batch result cleanup failed, retrying per query: {e}")
+            cleared = False
+        
         for record in self:
             try:
-                record.result_ids.unlink()
-                record._execute_single_model_search()
+                # A database error (e.g. a value of the wrong type in the LLM
+                # domain) only rolls back this query, so the error can be saved
+                with self.env.cr.savepoint():
+                    if not cleared:
+                        record._clear_results()
+                    record._execute_single_model_search(llm_responses.get(record.id))
                     
             except Exception as e:
-                record.status = 'error'
-                record.error_message = str(e)
+                record.invalidate_recordset()
+                record.write({'status': 'error', 'error_message': str(e)})
                 _logger.error(f"Error executing search: {e}")
     
-    def _execute_single_model_search(self):
+    def _clear_results(self):
         """
-        Execute a standard single-model search with automatic SQL fallback.
+        Delete the previous result lines of these queries in one batch.
         
-        Flow:
-        1. Validate category and select model
-        2. Try generating Odoo domain from natural language
-        3. If domain is empty or invalid, detect if SQL is needed
-        4. If SQL is needed, generate and execute SQL query
-        5. Store results and execution metadata
+        Small sets go through unlink(); large ones (many queries re-executed
+        together) are removed with a single DELETE after the same access check.
         """
-        if not self.category:
-            raise UserError(_('Please select a category (Clienti, Prodotti, etc.) before searching.'))
+        results = self.result_ids
+        if len(results) <= RESULTS_SQL_DELETE_THRESHOLD:
+            results.unlink()
+            return
         
-        available_models = self.CATEGORY_MODELS.get(self.category, ['res.partner'])
+        results.check_access('unlink')
+        SearchResult = self.env['search.result']
+        SearchResult.flush_model()
+        self.env.cr.execute("DELETE FROM search_result WHERE query_id IN %s", [tuple(self.ids)])
+        SearchResult.invalidate_model()
+        self.invalidate_recordset(['result_ids'])
+    
+    def action_queue_search(self):
+        """
+        Run the search in the background instead of blocking the HTTP worker.
+        
+        The queries are marked 'queued' and executed by the queue_job module
+        when it is installed, otherwise by the "Run queued searches" cron,
+        which is triggered immediately. Reload the query to see the results.
+        """
+        self.write({'status': 'queued', 'error_message': False})
+        if 'queue.job' in self.env:
+            for user, records in self.grouped('created_by_user').items():
+                records.with_user(user or self.env.user).with_delay()._run_queued_search()
+        else:
+            self.env.ref('ovunque.ir_cron_run_queued_searches').sudo()._trigger()
+    
+    def _run_queued_search(self):
+        """Execute the queries that are still queued (they may have been run meanwhile)."""
+        queued = self._lock_queued([('id', 'in', self.ids)])
+        if queued:
+            queued.action_execute_search()
+    
+    @api.model
+    def _lock_queued(self, domain, limit=None):
+        """
+        Lock the queued queries matching domain for this transaction.
+        
+        Uses SELECT ... FOR UPDATE SKIP LOCKED, so a query already picked up by
+        another worker (queue_job or the cron) is skipped instead of being sent
+        to the LLM twice; the status is read after the lock is taken.
+        
+        Args:
+            domain (list): Extra conditions on the queries
+            limit (int): Maximum number of queries to lock
+            
+        Returns:
+            search.query: The locked queries, oldest first
+        """
+        self.flush_model(['status'])
+        query = self._search(domain + [('status', '=', 'queued')], order='id', limit=limit)
+        sql = query.select('"search_query"."id"')
+        self.env.cr.execute(tools.SQL("%s FOR UPDATE SKIP LOCKED", sql))
+        queued = self.browse([row[0] for row in self.env.cr.fetchall()])
+        queued.invalidate_recordset(['status'])
+        return queued
+    
+    @api.model
+    def _cron_run_queued_searches(self, batch_size=50):
+        """
+        Execute queued queries in batches, committing after each batch.
+        
+        Each query runs as the user who created it, so the search respects
+        that user's access rights instead of the cron user's.
+        """
+        while True:
+            queued = self._lock_queued([], limit=batch_size)
+            if not queued:
+                return
+            for user, records in queued.grouped('created_by_user').items():
+                records.with_user(user or self.env.user).action_execute_search()
+            # Each query ran in its own savepoint and is 'success' or 'error' now;
+            # anything left queued is failed so the loop always progresses
+            queued.filtered(lambda record: record.status == 'queued').write({
+                'status': 'error',
+                'error_message': _('The background search could not be executed.'),
+            })
+            self.env.cr.commit()
+    
+    def _prefetch_llm_responses(self):
+        """
+        Fetch the LLM responses of several queries concurrently.
+        
+        The ORM is not thread-safe, so everything that reads the database
+        (model selection, field introspection, prompt building, cache lookup)
+        runs here in the calling thread. Only the network-bound OpenAI calls
+        are dispatched to a thread pool, turning N sequential round-trips into
+        roughly one. Different queries on the same model are packed into one
+        completion (up to LLM_BATCH_SIZE), so the shared model context is sent
+        once; a batch whose answer doesn't match falls back to single calls.
         
-        valid_model = None
-        for model in available_models:
+        Records that fail preparation, match a fast path or hit a response
+        cache are skipped; they follow the normal sequential path and report
+        their own errors.
+        Records with identical prompts are sent once and share the response.
+        
+        Returns:
+            dict: {record id: response text or the exception raised by the call}
+        """
+        api_key = self.env['ir.config_parameter'].sudo().get_param('ovunque.openai_api_key')
+        if not api_key or self._get_semantic_cache_threshold():
+            # Without a key every record fails anyway; with the semantic cache
+            # enabled a similar cached query may make the call unnecessary
+            return {}
+        self._configure_rate_limits()
+        
+        # Queries producing the same prompt (same text and model) share one call
+        messages_by_key = {}
+        record_ids_by_key = {}
+        keys_by_model = {}
+        for record in self:
             try:
-                self.env[model]
-                valid_model = model
-                break
-            except KeyError:
-                _logger.warning(f"[CHECK] Model {model} not installed")
+                record._select_model()
+                if record._match_fast_path() is not None:
+                    continue
+                messages = record._build_llm_messages()
+            except Exception as e:
+                _logger.warning(f"[LLM-BATCH] Skipping query {record.id}: {e}")
+                continue
+            cache_key = _llm_cache_key(LLM_MODEL, messages)
+            if record._get_reusable_response(cache_key, mark_used=False) is not None:
                 continue
+            if cache_key not in messages_by_key:
+                messages_by_key[cache_key] = messages
+                keys_by_model.setdefault(record.model_name, []).append((cache_key, record))
+            record_ids_by_key.setdefault(cache_key, []).append(record.id)
+        
+        if not messages_by_key:
+            return {}
+        
+        # Different queries on the same model are packed into one completion
+        jobs = []
+        for model_name, entries in keys_by_model.items():
+            for start in range(0, len(entries), LLM_BATCH_SIZE):
+                batch = entries[start:start + LLM_BATCH_SIZE]
+                cache_keys = [cache_key for cache_key, _record in batch]
+                if len(batch) == 1:
+                    jobs.append((cache_keys, None))
+                else:
+                    queries = [record.name for _cache_key, record in batch]
+                    jobs.append((cache_keys, batch[0][1]._build_llm_batch_messages(queries)))
+        
+        def call_one(cache_key):
+            try:
+                return self._call_llm(api_key, messages_by_key[cache_key])
+            except Exception as e:
+                return e
+        
+        def call(job):
+            cache_keys, batch_messages = job
+            if batch_messages:
+                try:
+                    return dict(zip(cache_keys, self._call_llm_batch(api_key, batch_messages, len(cache_keys))))
+                except Exception as e:
+                    # Answer the queries one by one instead
+                    _logger.warning(f"[LLM-BATCH] Batched call failed ({e}), falling back to single calls")
+            return {cache_key: call_one(cache_key) for cache_key in cache_keys}
+        
+        _logger.debug(
+            "[LLM-BATCH] Sending %s requests concurrently for %s queries",
+            len(jobs), sum(map(len, record_ids_by_key.values())),
+        )
+        responses_by_key = {}
+        workers = min(self._get_max_concurrency(), len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for responses in executor.map(call, jobs):
+                responses_by_key.update(responses)
+        
+        return {
+            record_id: responses_by_key[cache_key]
+            for cache_key, record_ids in record_ids_by_key.items()
+            for record_id in record_ids
+        }
+    
+    def _call_llm_batch(self, api_key, messages, count):
+        """
+        Answer several queries with one completion (see _build_llm_batch_messages).
+        
+        Args:
+            api_key (str): OpenAI API key
+            messages (list): Batch chat messages
+            count (int): Number of queries in the batch
+            
+        Returns:
+            list: One response text per query, each shaped like a single-query
+                  answer so it goes through the usual parsing and caching
+            
+        Raises:
+            ValueError: If the answer does not hold exactly one result per query
+        """
+        response_text = self._call_llm(
+            api_key, messages,
+            response_format=LLM_BATCH_RESPONSE_FORMAT,
+            max_tokens=LLM_MAX_TOKENS * count,
+        )
+        results = json.loads(response_text).get('results')
+        if not isinstance(results, list) or len(results) != count:
+            raise ValueError(f"expected {count} results, got {len(results) if isinstance(results, list) else 'none'}")
+        return [json.dumps(result) for result in results]
+    
+    def _select_model(self):
+        """
+        Select the Odoo model to search from the query category.
+        
+        Picks the first installed model in CATEGORY_MODELS for the category
+        and stores it in model_name.
+        
+        Raises:
+            UserError: If no category is set or none of its models is installed
+        """
+        if not self.category:
+            raise UserError(_('Please select a category (Clienti, Prodotti, etc.) before searching.'))
+        
+        available_models = self.CATEGORY_MODELS.get(self.category, ['res.partner'])
+        valid_model = self._get_category_model(self.category)
         
         if not valid_model:
             category_label = dict(self._fields['category'].selection).get(self.category, self.category)
@@ -223,40 +1149,71 @@ class SearchQuery(models.Model):
             ) % (category_label, ', '.join(available_models))
             raise UserError(error_msg)
         
-        self.model_name = valid_model
-        _logger.warning(f"[SELECT] Category {self.category} → Model {valid_model}")
+        if self.model_name != valid_model:
+            self.model_name = valid_model
+        _logger.debug("[SELECT] Category %s → Model %s", self.category, valid_model)
+    
+    @api.model
+    @tools.ormcache('category')
+    def _get_category_model(self, category):
+        """
+        Return the first installed model for a category, or None.
+        
+        Cached per registry: installing or removing a module rebuilds the
+        registry and clears the cache, so the lookup only runs once per
+        category and worker instead of on every search.
+        """
+        for model in self.CATEGORY_MODELS.get(category, ['res.partner']):
+            if model in self.env.registry:
+                return model
+            _logger.warning(f"[CHECK] Model {model} not installed")
+        return None
+    
+    def _execute_single_model_search(self, llm_response=None):
+        """
+        Execute a standard single-model search with automatic SQL fallback.
+        
+        Flow:
+        1. Validate category and select model
+        2. Try generating Odoo domain from natural language
+        3. If domain is empty or invalid, detect if SQL is needed
+        4. If SQL is needed, generate and execute SQL query
+        5. Store results and execution metadata
+        
+        Args:
+            llm_response (str or Exception): Response already fetched by
+                _prefetch_llm_responses, used instead of calling the API
+        """
+        self._select_model()
         
         # Parse natural language to get either domain (list) or structured query (dict)
-        query_response = self._parse_natural_language()
+        query_response = self._parse_natural_language(llm_response)
         
         # Check if response is structured query (dict with query_type) or simple domain (list)
         if isinstance(query_response, dict) and 'query_type' in query_response:
-            _logger.warning(f"[STRUCTURED] Recognized query type: {query_response['query_type']}")
-            self.query_type = query_response['query_type']
-            self.query_spec = json.dumps(query_response)
-            self.is_multi_model = True
-            self._execute_structured_query(query_response)
+            _logger.debug("[STRUCTURED] Recognized query type: %s", query_response['query_type'])
+            vals = {
+                'query_type': query_response['query_type'],
+                'query_spec': json.dumps(query_response),
+                'is_multi_model': True,
+            }
+            vals.update(self._execute_structured_query(query_response))
         else:
             # Simple domain query
-            self.query_type = 'simple_domain'
-            self.is_multi_model = False
             domain = query_response if isinstance(query_response, list) else []
-            self.model_domain = str(domain)
             
             # Execute domain search
             Model = self.env[self.model_name]
-            results = Model.search(domain)
-            self.results_count = len(results)
-            self.status = 'success'
-            
-            result_data = []
-            for res in results:
-                result_data.append((0, 0, {
-                    'record_id': res.id,
-                    'record_name': res.display_name,
-                    'model': self.model_name,
-                }))
-            self.result_ids = result_data
+            vals = {
+                'query_type': 'simple_domain',
+                'is_multi_model': False,
+                'model_domain': str(domain),
+                'results_count': self._search_and_store(Model, domain),
+            }
+        
+        # All execution metadata is saved with a single write
+        vals['status'] = 'success'
+        self.write(vals)
     
     def _execute_structured_query(self, query_spec):
         """
@@ -284,33 +1241,40 @@ class SearchQuery(models.Model):
               'threshold': 10,
               'comparison': '>='
             }
+        
+        Returns:
+            dict: results_count and model_domain values to write on the query
         """
         try:
             query_type = query_spec.get('query_type')
-            _logger.warning(f"[STRUCTURED-EXEC] Executing query type: {query_type}")
+            _logger.debug("[STRUCTURED-EXEC] Executing query type: %s", query_type)
             
             if query_type == 'count_aggregate':
-                self._execute_count_aggregate_from_spec(query_spec)
+                vals = self._execute_count_aggregate_from_spec(query_spec)
             elif query_type == 'exclusion':
-                self._execute_exclusion_from_spec(query_spec)
+                vals = self._execute_exclusion_from_spec(query_spec)
             else:
                 raise UserError(_(f'Unknown query type: {query_type}'))
             
-            self.status = 'success'
-            _logger.warning(f"[STRUCTURED-EXEC] Success: {self.results_count} results")
+            _logger.debug("[STRUCTURED-EXEC] Success: %s results", vals['results_count'])
+            return vals
             
         except UserError:
             raise
         except Exception as e:
             _logger.error(f"[STRUCTURED-EXEC ERROR] {str(e)}")
-            self.status = 'error'
-            self.error_message = str(e)
             raise UserError(_(
                 'Structured query execution failed: %s\n\n'
                 'The AI may have generated invalid query parameters.\n'
                 'Try rephrasing your query.'
             ) % str(e)[:100])
     
+    # PERF: the cost of count_aggregate/exclusion queries is loading secondary
+    # records through the ORM, not the Python arithmetic, so JIT-compiling the
+    # counting loops (numba/Cython) would not help and would add a long compile
+    # on first use. Stored link fields are aggregated in SQL instead
+    # (_read_group with HAVING here, a NOT IN subquery in the exclusion);
+    # the Python loops only remain for non-stored link fields.
     def _execute_count_aggregate_from_spec(self, query_spec):
         """
         Execute count aggregation from structured spec.
@@ -325,6 +1289,9 @@ class SearchQuery(models.Model):
               'threshold': 10,
               'comparison': '>='
             }
+        
+        Returns:
+            dict: results_count and model_domain values to write on the query
         """
         primary_model_name = query_spec['primary_model']
         secondary_model_name = query_spec['secondary_model']
@@ -332,63 +1299,49 @@ class SearchQuery(models.Model):
         threshold = query_spec.get('threshold', 1)
         comparison = query_spec.get('comparison', '>=')
         
-        _logger.warning(f"[STRUCTURED-AGG] Aggregating {secondary_model_name} by {link_field}")
-        _logger.warning(f"[STRUCTURED-AGG] Threshold: {comparison} {threshold}")
+        _logger.debug("[STRUCTURED-AGG] Aggregating %s by %s", secondary_model_name, link_field)
+        _logger.debug("[STRUCTURED-AGG] Threshold: %s %s", comparison, threshold)
         
         PrimaryModel = self.env[primary_model_name]
         SecondaryModel = self.env[secondary_model_name]
+        self._check_link_field(SecondaryModel, link_field)
         
-        # Count records per primary ID
-        secondary_records = SecondaryModel.search([])
-        counts = {}
-        
-        for record in secondary_records:
-            try:
-                link_value = record[link_field]
-                if link_value:
-                    link_id = link_value.id if hasattr(link_value, 'id') else link_value
-                    counts[link_id] = counts.get(link_id, 0) + 1
-            except:
-                pass
-        
-        # Filter by comparison operator
-        matching_ids = []
-        for primary_id, count in counts.items():
-            if comparison == '>=':
-                if count >= threshold:
-                    matching_ids.append(primary_id)
-            elif comparison == '>':
-                if count > threshold:
-                    matching_ids.append(primary_id)
-            elif comparison == '<=':
-                if count <= threshold:
-                    matching_ids.append(primary_id)
-            elif comparison == '<':
-                if count < threshold:
-                    matching_ids.append(primary_id)
-            elif comparison == '=':
-                if count == threshold:
-                    matching_ids.append(primary_id)
-        
-        _logger.warning(f"[STRUCTURED-AGG] Found {len(matching_ids)} {primary_model_name} records")
-        
-        # Search primary model with matched IDs
-        if matching_ids:
-            results = PrimaryModel.search([('id', 'in', matching_ids)])
+        if comparison not in COUNT_COMPARISONS:
+            raise UserError(_(
+                'Unsupported comparison "%s" in the structured query.\n\n'
+                'Try rephrasing your query.'
+            ) % comparison)
+        
+        if SecondaryModel._fields[link_field].store:
+            # One GROUP BY ... HAVING COUNT(*) query instead of loading every record
+            groups = SecondaryModel._read_group(
+                [(link_field, '!=', False)],
+                groupby=[link_field],
+                having=[('__count', comparison, threshold)],
+            )
+            matching_ids = [linked.id for linked, in groups]
         else:
-            results = PrimaryModel.search([('id', '=', False)])  # Empty result
+            # Count records per primary ID: the ids are chained into one
+            # Counter, which does the counting in C instead of a dict update per id
+            secondary_records = SecondaryModel.search([])
+            # (not mapped(link_field), whose union would drop the duplicates)
+            counts = Counter(chain.from_iterable(
+                self._get_link_ids(record[link_field]) for record in secondary_records
+            ))
+            
+            # Filter by comparison operator
+            compare = COUNT_COMPARISONS[comparison]
+            matching_ids = [primary_id for primary_id, count in counts.items() if compare(count, threshold)]
+        
+        _logger.debug("[STRUCTURED-AGG] Found %s %s records", len(matching_ids), primary_model_name)
         
-        self.results_count = len(results)
-        self.model_domain = f"[('id', 'in', {matching_ids})]  # Structured: count aggregation"
+        # The ids come straight from the aggregation: no need to search them again
+        results_count = self._store_ids(PrimaryModel, matching_ids) if matching_ids else 0
         
-        result_data = []
-        for res in results:
-            result_data.append((0, 0, {
-                'record_id': res.id,
-                'record_name': res.display_name,
-                'model': primary_model_name,
-            }))
-        self.result_ids = result_data
+        return {
+            'results_count': results_count,
+            'model_domain': f"[('id', 'in', {matching_ids})]  # Structured: count aggregation",
+        }
     
     def _execute_exclusion_from_spec(self, query_spec):
         """
@@ -402,51 +1355,134 @@ class SearchQuery(models.Model):
               'secondary_model': 'sale.order',
               'link_field': 'product_id'
             }
+        
+        Returns:
+            dict: results_count and model_domain values to write on the query
         """
         primary_model_name = query_spec['primary_model']
         secondary_model_name = query_spec['secondary_model']
         link_field = query_spec['link_field']
         
-        _logger.warning(f"[STRUCTURED-EXC] Finding {primary_model_name} NOT in {secondary_model_name}")
+        _logger.debug("[STRUCTURED-EXC] Finding %s NOT in %s", primary_model_name, secondary_model_name)
         
         PrimaryModel = self.env[primary_model_name]
         SecondaryModel = self.env[secondary_model_name]
+        self._check_link_field(SecondaryModel, link_field)
+        
+        field = SecondaryModel._fields[link_field]
+        if field.store and field.type == 'many2one':
+            # Anti-join in the database: NOT IN (SELECT link_field ...) instead of
+            # loading every secondary record and sending back a huge id list.
+            # NULL links are excluded, otherwise NOT IN would match nothing.
+            referenced = SecondaryModel._search([(link_field, '!=', False)])
+            domain = [('id', 'not in', referenced.subselect(link_field))]
+            return {
+                'results_count': self._search_and_store(PrimaryModel, domain),
+                'model_domain': (
+                    f"[('id', 'not in', {secondary_model_name}.{link_field})]  # Structured: exclusion"
+                ),
+            }
         
         # Find all primary IDs referenced in secondary model
         secondary_records = SecondaryModel.search([])
         referenced_ids = set()
         
         for record in secondary_records:
-            try:
-                link_value = record[link_field]
-                if link_value:
-                    link_id = link_value.id if hasattr(link_value, 'id') else link_value
-                    referenced_ids.add(link_id)
-            except:
-                pass
-        
-        _logger.warning(f"[STRUCTURED-EXC] Found {len(referenced_ids)} referenced IDs")
-        
-        # Search primary model NOT in referenced IDs
-        if referenced_ids:
-            results = PrimaryModel.search([('id', 'not in', list(referenced_ids))])
-        else:
-            # If nothing is referenced, return all active records
-            results = PrimaryModel.search([('active', '=', True)])
+            referenced_ids.update(self._get_link_ids(record[link_field]))
+        
+        _logger.debug("[STRUCTURED-EXC] Found %s referenced IDs", len(referenced_ids))
+        
+        # Search primary model NOT in referenced IDs (all records when nothing is referenced)
+        domain = [('id', 'not in', list(referenced_ids))] if referenced_ids else []
+        
+        return {
+            'results_count': self._search_and_store(PrimaryModel, domain),
+            'model_domain': f"[('id', 'not in', {list(referenced_ids)})]  # Structured: exclusion",
+        }
+
+    def _search_and_store(self, Model, domain):
+        """
+        Search Model and create the search.result lines for the matches.
+        
+        Ids and display names come from a single search_read(), capped at
+        MAX_RESULTS so a broad domain (e.g. []) can't load millions of
+        records, and all lines are inserted with one batched create().
+        Count-only queries run a single search_count() and store no lines.
+        
+        Args:
+            Model: Model to search (any model)
+            domain (list): Odoo domain
+            
+        Returns:
+            int: Total number of matching records (may exceed MAX_RESULTS)
+        """
+        if self.count_only:
+            return Model.search_count(domain)
+        rows = Model.search_read(domain, ['display_name'], limit=MAX_RESULTS)
+        self._create_result_lines(Model._name, rows)
+        if len(rows) < MAX_RESULTS:
+            return len(rows)
+        return Model.search_count(domain)
+    
+    def _store_ids(self, Model, ids):
+        """
+        Create the search.result lines for ids already computed in the database.
         
-        self.results_count = len(results)
-        self.model_domain = f"[('id', 'not in', {list(referenced_ids)})]  # Structured: exclusion"
+        Unlike _search_and_store(), no search is needed to rebuild the id list:
+        the ids are browsed, stale ones dropped with exists() and unreadable or
+        archived ones filtered out, like a search would.
         
-        result_data = []
-        for res in results:
-            result_data.append((0, 0, {
-                'record_id': res.id,
-                'record_name': res.display_name,
-                'model': primary_model_name,
-            }))
-        self.result_ids = result_data
+        Args:
+            Model: Model the ids belong to
+            ids (list): Record ids
+            
+        Returns:
+            int: Number of matching records (may exceed MAX_RESULTS)
+        """
+        records = Model.browse(ids).exists()._filtered_access('read')
+        if Model._active_name:
+            records = records.filtered(Model._active_name)
+        if not self.count_only:
+            self._create_result_lines(Model._name, records[:MAX_RESULTS].read(['display_name']))
+        return len(records)
+    
+    def _create_result_lines(self, model_name, rows):
+        """Insert one search.result line per {'id', 'display_name'} row, in one create()."""
+        if rows:
+            self.env['search.result'].create([{
+                'query_id': self.id,
+                'record_id': row['id'],
+                'record_name': row['display_name'],
+                'model': model_name,
+            } for row in rows])
 
-    def _parse_natural_language(self):
+    def _check_link_field(self, SecondaryModel, link_field):
+        """
+        Ensure the link field of a structured query exists on the secondary model.
+        
+        Raises:
+            UserError: If the LLM referenced a field that does not exist
+        """
+        if link_field not in SecondaryModel._fields:
+            raise UserError(_(
+                'The field "%s" does not exist on %s.\n\n'
+                'The AI may have generated invalid query parameters.\n'
+                'Try rephrasing your query.'
+            ) % (link_field, SecondaryModel._name))
+    
+    @staticmethod
+    def _get_link_ids(link_value):
+        """
+        Return the ids referenced by a link field value.
+        
+        Handles Many2one (single record), x2many (several records) and
+        plain integer values; empty values yield no ids.
+        """
+        if isinstance(link_value, models.BaseModel):
+            return link_value.ids
+        return [link_value] if link_value else []
+    
+    def _parse_natural_language(self, llm_response=None):
         """
         Convert natural language query to either Odoo domain or structured query format.
         
@@ -455,17 +1491,24 @@ class SearchQuery(models.Model):
         - Structured query: {'query_type': 'count_aggregate', ...}  (dict)
         
         Process:
-        1. Retrieve OpenAI API key
+        1. Retrieve OpenAI API key; canonical queries (_FAST_PATHS) return here
         2. Build prompt with field info AND examples of structured queries
-        3. Send to GPT-4
+        3. Reuse a cached response for an identical prompt, for the same query
+           stored in the database or run successfully before or, when the
+           semantic cache is enabled, for a similar query; otherwise send to GPT-4
         4. Try to parse response as JSON first (structured query)
         5. If JSON fails, parse as domain list (simple query)
-        6. Return either dict or list depending on what was recognized
+        6. Cache the response once it parsed successfully
+        7. Return either dict or list depending on what was recognized
         
         The LLM intelligently decides:
         - Simple filter? → Return domain list
         - Needs COUNT/JOIN? → Return JSON with query_type and metadata
         
+        Args:
+            llm_response (str or Exception): Response prefetched concurrently by
+                action_execute_search; replaces the API call when given
+        
         Returns:
             dict or list: Structured query dict OR Odoo domain list
             
@@ -485,61 +1528,57 @@ class SearchQuery(models.Model):
                 'Need help? Check the documentation in the module.'
             ))
         
+        # Canonical queries (e.g. "unpaid invoices") don't need the LLM at all
+        domain = self._match_fast_path()
+        if domain is not None:
+            _logger.debug("[LLM] Fast path for: %s", self.name)
+            self.raw_response = json.dumps({'domain': domain})
+            return domain
+        
         try:
-            _logger.warning(f"[LLM] Starting query parsing for: {self.name}")
-            _logger.warning(f"[LLM] Model name: {self.model_name}")
-            
-            if not self.model_name:
-                raise UserError(_('No model selected. Please select a category.'))
+            _logger.debug("[LLM] Starting query parsing for: %s", self.name)
+            _logger.debug("[LLM] Model name: %s", self.model_name)
             
-            try:
-                Model = self.env[self.model_name]
-            except KeyError:
-                raise UserError(_(
-                    'The module for "%s" is not installed.\n\n'
-                    'Please install the required module in Odoo:\n'
-                    '1. Go to Apps\n'
-                    '2. Search for "crm", "Sale", "Purchase", etc.\n'
-                    '3. Click Install\n\n'
-                    'Then come back and try again.'
-                ) % self.model_name)
-            
-            model_fields = Model.fields_get()
-            client = OpenAI(api_key=api_key)
-            
-            _logger.warning(f"[LLM] Model: {self.model_name}, Available fields: {len(model_fields)}")
+            messages = self._build_llm_messages()
+            self._configure_rate_limits()
             
-            prompt = self._build_prompt(model_fields)
-            _logger.warning(f"[LLM] Prompt length: {len(prompt)} chars")
+            # Identical prompts are served from the in-process cache without an API call
+            cache_key = _llm_cache_key(LLM_MODEL, messages)
+            response_text = self._get_reusable_response(cache_key)
+            QueryCache = self.env['search.query.cache']
+            embedding = None
+            from_api = False
+            if response_text is None:
+                # Paraphrases of an earlier query can be served from the semantic cache
+                threshold = self._get_semantic_cache_threshold()
+                if threshold:
+                    embedding = QueryCache._get_cached_embedding(self.name)
+                    if embedding is None:
+                        embedding = self._call_embedding(api_key, self.name)
+                    cached = QueryCache._lookup_similar(
+                        self.model_name, embedding, threshold
+                    )
+                    if cached:
+                        cached._mark_used()
+                        response_text = cached.response_text
+                if response_text is None:
+                    if isinstance(llm_response, Exception):
+                        raise llm_response
+                    response_text = llm_response or self._call_llm(api_key, messages)
+                    from_api = True
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an intelligent Odoo query generator. "
-                            "For SIMPLE queries, respond with Python domain syntax: [('field', 'op', 'value')] "
-                            "For COMPLEX queries (aggregation, counting, exclusion), respond with JSON metadata: "
-                            '{"query_type": "count_aggregate", "primary_model": "...", ...} '
-                            "Respond ONLY with the domain list or JSON. No explanations, no markdown."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.2,
-                max_tokens=1000
-            )
-            
-            response_text = response.choices[0].message.content.strip()
             self.raw_response = response_text
-            _logger.warning(f"[LLM] Response received: {response_text[:300]}")
+            _logger.debug("[LLM] Response received: %.300s", response_text)
             
             # Try to parse as JSON first (structured query)
             query_response = self._parse_query_response(response_text)
+            
+            # Only responses that parsed successfully are worth replaying
+            _llm_cache_put(cache_key, response_text)
+            if from_api:
+                QueryCache._store_response(
+                    self.model_name, self.name, embedding, response_text
+                )
             return query_response
             
         except UserError:
@@ -557,13 +1596,330 @@ class SearchQuery(models.Model):
             else:
                 raise UserError(_('Error communicating with OpenAI: %s\n\nPlease check Settings → Ovunque → API Settings.') % str(e)[:100])
     
+    def _match_fast_path(self):
+        """
+        Return the predefined domain of a canonical query (see _FAST_PATHS).
+        
+        The domain is validated like an LLM answer; when a field is missing
+        (e.g. accounting not installed) the query goes to the LLM instead.
+        
+        Returns:
+            list: Odoo domain, or None when the query is not a canonical one
+        """
+        text = ' '.join(self.name.lower().split()).rstrip('.?!')
+        for pattern, domain in _FAST_PATHS.get(self.model_name, ()):
+            if pattern.fullmatch(text):
+                domain = list(domain)
+                try:
+                    self._validate_domain_fields(domain)
+                except UserError:
+                    return None
+                return domain
+        return None
+    
+    def _get_reusable_response(self, cache_key, mark_used=True):
+        """
+        Return a response that answers this query without calling any API.
+        
+        Looked up, in order, in the in-process cache (identical prompt), the
+        persistent cache (same query in any worker) and the earlier successful
+        runs of the same query. Shared by _parse_natural_language and the
+        concurrent prefetch, so both skip exactly the same queries.
+        
+        Args:
+            cache_key (str): Key of the prompt in the in-process cache
+            mark_used (bool): Count a persistent cache hit (False when only
+                checking whether an API call is needed)
+            
+        Returns:
+            str: Raw LLM response, or None when the LLM must be asked
+        """
+        response_text = _llm_cache_get(cache_key)
+        if response_text is not None:
+            _logger.debug("[LLM] Cache hit for prompt %.12s", cache_key)
+            return response_text
+        
+        # The same query asked earlier (in any worker) is served from the database
+        cached = self.env['search.query.cache']._lookup_exact(self.model_name, self.name)
+        if cached:
+            _logger.debug("[LLM] Stored response reused for: %s", self.name)
+            if mark_used:
+                cached._mark_used()
+            return cached.response_text
+        
+        # ...or taken from an earlier successful run of the same query
+        return self._get_prior_response()
+    
+    def _get_prior_response(self):
+        """
+        Return the raw LLM response of an earlier successful run of this query.
+        
+        Covers queries whose cache entry was evicted: the lookup goes through
+        the indexed query_hash instead of comparing query texts. Runs older
+        than the cache TTL are ignored, like expired cache entries.
+        
+        Returns:
+            str: Raw LLM response, or None when the query never succeeded
+        """
+        domain = [
+            ('query_hash', '=', self.query_hash),
+            ('status', '=', 'success'),
+            ('raw_response', '!=', False),
+            ('id', '!=', self.id),
+        ]
+        cutoff = self.env['search.query.cache']._get_ttl_cutoff()
+        if cutoff:
+            domain.append(('write_date', '>=', cutoff))
+        prior = self.sudo().search(domain, limit=1, order='id desc')
+        if not prior:
+            return None
+        _logger.debug("[LLM] Response of query %s reused for: %s", prior.id, self.name)
+        return prior.raw_response
+    
+    def _build_llm_messages(self):
+        """
+        Build the chat messages (system + user prompt) for this query.
+        
+        Returns:
+            list: Messages ready for the chat completion API
+            
+        Raises:
+            UserError: If no model is selected or its module is not installed
+        """
+        if not self.model_name:
+            raise UserError(_('No model selected. Please select a category.'))
+        
+        if self.model_name not in self.env:
+            raise UserError(_(
+                'The module for "%s" is not installed.\n\n'
+                'Please install the required module in Odoo:\n'
+                '1. Go to Apps\n'
+                '2. Search for "crm", "Sale", "Purchase", etc.\n'
+                '3. Click Install\n\n'
+                'Then come back and try again.'
+            ) % self.model_name)
+        
+        _logger.debug("[LLM] Model: %s", self.model_name)
+        
+        # Static rules, then the per-model schema, then the query: the longest
+        # possible prefix is shared with other queries for OpenAI prompt caching
+        model_context = self._build_model_context()
+        prompt = self._build_prompt()
+        _logger.debug("[LLM] Prompt length: %s chars", len(model_context) + len(prompt))
+        
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": model_context
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        return messages
+    
+    def _build_llm_batch_messages(self, queries):
+        """
+        Build the chat messages answering several queries on this model at once.
+        
+        The model context is sent once, followed by the numbered queries; the
+        answer is {"results": [...]} with one LLM_RESPONSE_SCHEMA object per
+        query, in order (see LLM_BATCH_RESPONSE_FORMAT).
+        
+        Args:
+            queries (list): Natural language queries targeting self.model_name
+            
+        Returns:
+            list: Messages ready for the chat completion API
+        """
+        numbered = "\n".join(f'{index}. "{query}"' for index, query in enumerate(queries, 1))
+        prompt = BATCH_TASK_PROMPT_TEMPLATE.format_map({'count': len(queries), 'queries': numbered})
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self._build_model_context()},
+            {"role": "user", "content": prompt},
+        ]
+    
+    def _call_llm(self, api_key, messages, response_format=LLM_RESPONSE_FORMAT, max_tokens=LLM_MAX_TOKENS):
+        """
+        Send the chat messages to OpenAI and return the raw response text.
+        
+        This is the only place that talks to the OpenAI API. It does not touch
+        the ORM, so callers are responsible for caching and error translation.
+        
+        Args:
+            api_key (str): OpenAI API key
+            messages (list): Chat messages (system + user)
+            response_format (dict): Structured outputs schema of the answer
+            max_tokens (int): Completion token budget
+            
+        Returns:
+            str: Stripped text content of the first choice, up to the end of
+                 the first complete [...] or {...} value
+        """
+        # Roughly 4 characters per token for the prompt, plus the completion budget
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + max_tokens
+        client = _get_openai_client(api_key)
+        prefix_key = _llm_cache_key(LLM_MODEL, messages[:-1])[:32]
+        
+        request_bucket = self._get_request_bucket()
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            waited = request_bucket.acquire() + _llm_token_bucket.acquire(estimated_tokens)
+            if waited:
+                _logger.info("[LLM] Rate limiter delayed request by %.2fs", waited)
+            try:
+                stream = client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    # Deterministic answers: identical queries give identical domains
+                    temperature=0,
+                    max_tokens=max_tokens,
+                    response_format=response_format,
+                    stream=True,
+                    timeout=LLM_TIMEOUT,
+                    # Route requests sharing the same prefix (same model) to the same cache
+                    extra_body={"prompt_cache_key": prefix_key},
+                )
+                break
+            except AuthenticationError:
+                _evict_openai_client(api_key)
+                raise
+            except Exception as e:
+                # Transient failures (rate limit, 5xx, timeout, connection) are
+                # retried with exponential backoff and jitter
+                delay = 0.5 * 2 ** attempt + random.uniform(0, 0.3)
+                if getattr(e, 'status_code', None) == 429:
+                    # Pause every caller of this process for the time OpenAI asks for
+                    retry_after = self._get_retry_after(e)
+                    request_bucket.penalize(retry_after)
+                    _llm_token_bucket.penalize(retry_after)
+                    delay = max(delay, retry_after)
+                if attempt == LLM_MAX_ATTEMPTS - 1 or not self._is_retryable_error(e):
+                    raise
+                _logger.warning(f"[LLM] Attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        
+        # The answer is a single domain list or JSON object: stop reading as
+        # soon as its closing bracket arrives instead of waiting for the end
+        scanner = _BracketScanner()
+        chunks = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ''
+                end = scanner.feed(text)
+                if end >= 0:
+                    chunks.append(text[:end + 1])
+                    break
+                chunks.append(text)
+        finally:
+            stream.close()
+        
+        return ''.join(chunks).strip()
+    
+    @staticmethod
+    def _is_retryable_error(error):
+        """Tell whether an OpenAI error is transient (rate limit, server error, network)."""
+        status_code = getattr(error, 'status_code', None)
+        if status_code is not None:
+            return status_code == 429 or status_code >= 500
+        return isinstance(error, (APITimeoutError, APIConnectionError))
+    
+    @staticmethod
+    def _get_retry_after(error, default=5.0):
+        """
+        Read the Retry-After delay (seconds) of an OpenAI rate-limit error.
+        
+        Falls back to `default` when the header is missing or not a number.
+        """
+        response = getattr(error, 'response', None)
+        value = response.headers.get('retry-after') if response is not None else None
+        try:
+            return float(value) if value else default
+        except ValueError:
+            return default
+    
+    def _configure_rate_limits(self):
+        """Apply ovunque.llm_rpm / ovunque.llm_tpm to the rate limiters."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        for bucket, param in ((_llm_request_bucket, 'ovunque.llm_rpm'),
+                              (_llm_token_bucket, 'ovunque.llm_tpm')):
+            try:
+                bucket.configure(max(int(ICP.get_param(param) or 0), 0))
+            except ValueError:
+                _logger.warning(f"[LLM] Invalid {param}: {ICP.get_param(param)}")
+    
+    def _get_request_bucket(self):
+        """
+        Return the limiter for the number of OpenAI requests.
+        
+        When ovunque.llm_rpm is set, the limit applies to the whole database
+        (all workers share one _SharedTokenBucket); otherwise the unlimited
+        per-process bucket is returned. Only reads the value cached by
+        _configure_rate_limits, so it is safe to call from the prefetch threads.
+        """
+        per_minute = _llm_request_bucket.per_minute
+        if not per_minute:
+            return _llm_request_bucket
+        return _SharedTokenBucket(self.env.registry, LLM_RPM_STATE_KEY, per_minute)
+    
+    def _get_max_concurrency(self):
+        """Return ovunque.llm_max_concurrency, or LLM_MAX_CONCURRENCY when unset or invalid."""
+        value = self.env['ir.config_parameter'].sudo().get_param('ovunque.llm_max_concurrency')
+        try:
+            return max(int(value), 1) if value else LLM_MAX_CONCURRENCY
+        except ValueError:
+            _logger.warning(f"[LLM] Invalid ovunque.llm_max_concurrency: {value}")
+            return LLM_MAX_CONCURRENCY
+    
+    def _call_embedding(self, api_key, text):
+        """
+        Embed a query text with OpenAI for the semantic cache.
+        
+        Args:
+            api_key (str): OpenAI API key
+            text (str): Natural language query
+            
+        Returns:
+            list: Embedding vector (floats)
+        """
+        client = _get_openai_client(api_key)
+        # The shared client doesn't retry on its own (see _call_llm); keep the SDK retries here
+        response = client.with_options(max_retries=2, timeout=LLM_TIMEOUT).embeddings.create(
+            model=EMBEDDING_MODEL, input=text,
+        )
+        return response.data[0].embedding
+    
+    def _get_semantic_cache_threshold(self):
+        """
+        Read the semantic cache similarity threshold from system parameters.
+        
+        Returns:
+            float: Threshold in (0, 1], or 0.0 when the semantic cache is disabled
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('ovunque.semantic_cache_threshold')
+        try:
+            threshold = float(value) if value else 0.0
+        except ValueError:
+            _logger.warning(f"[CACHE] Invalid ovunque.semantic_cache_threshold: {value}")
+            return 0.0
+        return threshold if 0.0 < threshold <= 1.0 else 0.0
+    
     def _parse_query_response(self, response_text):
         """
         Parse LLM response as either JSON (structured query) or domain (simple query).
         
         Intelligently detects which format the LLM returned:
-        1. Try JSON parsing first (structured query with query_type)
-        2. If JSON fails, try domain parsing (list of tuples)
+        1. Try JSON parsing first (structured query with query_type,
+           or {"domain": [...]} as enforced by LLM_RESPONSE_SCHEMA)
+        2. If JSON fails, try domain parsing (list of tuples), e.g. for
+           responses cached before structured outputs were used
         3. Return either dict or list
         
         Args:
@@ -578,117 +1934,97 @@ class SearchQuery(models.Model):
         - [PARSE-DOMAIN] - Domain parsing phase (fallback)
         """
         response_text = response_text.strip()
+        if len(response_text) > MAX_RESPONSE_CHARS:
+            raise UserError(_(
+                'The AI response is too long to be a search (%s characters).\n\n'
+                'Try rephrasing your query.'
+            ) % len(response_text))
         
         # First attempt: try JSON parsing
-        _logger.warning(f"[PARSE-JSON] Attempting JSON parse: {response_text[:200]}")
+        _logger.debug("[PARSE-JSON] Attempting JSON parse: %.200s", response_text)
         try:
             data = json.loads(response_text)
-            if isinstance(data, dict) and 'query_type' in data:
-                _logger.warning(f"[PARSE-JSON] ✓ Parsed as structured query: type={data.get('query_type')}")
-                return data
+            if isinstance(data, dict) and data.get('query_type'):
+                _logger.debug("[PARSE-JSON] ✓ Parsed as structured query: type=%s", data.get('query_type'))
+                # Schema-shaped answers carry the unused keys as null
+                return {key: value for key, value in data.items() if value is not None and key != 'domain'}
+            elif isinstance(data, dict) and isinstance(data.get('domain'), list):
+                domain = self._domain_from_json(data['domain'])
+                _logger.debug("[PARSE-JSON] ✓ Parsed as JSON domain: %s", domain)
+                return domain
             else:
-                _logger.warning(f"[PARSE-JSON] JSON is valid but not structured query (no query_type)")
+                _logger.debug("[PARSE-JSON] JSON is valid but not structured query (no query_type)")
         except json.JSONDecodeError as e:
-            _logger.warning(f"[PARSE-JSON] JSON parsing failed: {str(e)[:100]}")
+            _logger.debug("[PARSE-JSON] JSON parsing failed: %.100s", e)
         
         # Second attempt: try domain parsing
-        _logger.warning(f"[PARSE-DOMAIN] Parsing as Odoo domain")
+        _logger.debug("[PARSE-DOMAIN] Parsing as Odoo domain")
         domain = self._parse_domain_response(response_text)
-        _logger.warning(f"[PARSE-DOMAIN] Parsed domain: {domain}")
+        _logger.debug("[PARSE-DOMAIN] Parsed domain: %s", domain)
         return domain
 
-    def _build_prompt(self, model_fields):
+    def _domain_from_json(self, json_domain):
         """
-        Build a detailed prompt for GPT-4 that includes:
-        - Model information and description
-        - All available database fields (stored only, no computed fields)
-        - Examples specific to this model type
-        - Clear rules for domain generation
-        - The user's natural language query
+        Convert a JSON domain ([["field", "op", value], "|", ...]) to an Odoo domain.
         
-        The prompt is designed to minimize hallucination and encourage
-        GPT-4 to generate valid Odoo domains.
+        Clauses become tuples, operator strings ('|', '&', '!') are kept as is,
+        then the usual price-field fixes and field validation are applied.
         
         Args:
-            model_fields: Dictionary of fields from Model.fields_get()
+            json_domain (list): The "domain" value of the LLM JSON response
             
         Returns:
-            str: Complete prompt ready for GPT-4 API call
+            list: Validated Odoo domain
+            
+        Raises:
+            UserError: If a field is invalid or computed
+        """
+        if not json_domain:
+            return []
+        domain = [tuple(clause) if isinstance(clause, list) else clause for clause in json_domain]
+        domain = self._fix_price_fields(domain)
+        self._validate_domain_fields(domain)
+        return domain
+    
+    def _build_prompt(self):
         """
-        fields_info = self._get_field_info(model_fields)
-        model_examples = self._get_model_examples()
+        Build the last user message for GPT-4: the natural language query.
         
-        prompt = f"""TASK: Convert natural language query to Odoo query (domain or structured format).
-
-===== DECISION TREE =====
-1. Is this a SIMPLE filter? (e.g., "active invoices", "clients from Milan")
-   → Respond with Python domain list: [('field', 'operator', 'value')]
-
-2. Is this a COMPLEX query? (requires counting, aggregation, or exclusion)
-   Examples: "Clients with 10+ invoices", "Products never ordered"
-   → Respond with JSON metadata:
-   {{"query_type": "count_aggregate", "primary_model": "res.partner", ...}}
-
-===== MODEL INFORMATION =====
-Model: {self.model_name}
-Description: {self._get_model_description()}
-
-===== AVAILABLE FIELDS (DATABASE STORED ONLY) =====
-{fields_info}
-
-===== FIELD EXAMPLES FOR THIS MODEL =====
-{model_examples}
-
-===== SIMPLE DOMAIN RULES =====
-1. Respond with ONLY: [(...), (...)]
-2. Field names must EXACTLY match the list above
-3. Operators: '=', '!=', '>', '<', '>=', '<=', 'ilike', 'like', 'in', 'not in'
-4. Dates: YYYY-MM-DD format
-5. Numbers: plain integers/floats (100, not 100€)
-6. Booleans: True/False (no quotes)
-
-===== STRUCTURED QUERY RULES (Complex queries) =====
-Respond with JSON when query needs multi-model logic:
-
-PATTERN 1 - COUNT AGGREGATION: "Clients with 10+ invoices"
-{{
-  "query_type": "count_aggregate",
-  "primary_model": "res.partner",
-  "secondary_model": "account.move",
-  "link_field": "partner_id",
-  "threshold": 10,
-  "comparison": ">="
-}}
-
-PATTERN 2 - EXCLUSION: "Products never ordered"
-{{
-  "query_type": "exclusion",
-  "primary_model": "product.template",
-  "secondary_model": "sale.order",
-  "link_field": "product_id"
-}}
-
-===== RESPONSE EXAMPLES =====
-
-SIMPLE DOMAIN QUERIES:
-[('state', '=', 'confirmed')]
-[('name', 'ilike', 'test'), ('active', '=', True)]
-[('amount_total', '>', 1000)]
-[]
-
-STRUCTURED QUERIES:
-{{"query_type": "count_aggregate", "primary_model": "res.partner", "secondary_model": "account.move", "link_field": "partner_id", "threshold": 3, "comparison": ">="}}
-{{"query_type": "exclusion", "primary_model": "product.template", "secondary_model": "sale.order", "link_field": "product_id"}}
-
-===== YOUR TASK =====
-Query: "{self.name}"
-
-Analyze: Does this query need multi-model logic (counting, aggregation)?
-- YES → Respond ONLY with JSON (structured query)
-- NO → Respond ONLY with domain list [(...)]
-
-Response:"""
-        return prompt
+        It is the only query-specific part of the conversation. The rules and
+        response examples live in SYSTEM_PROMPT and the model information,
+        fields and examples in _build_model_context, so everything before
+        this message is a stable prefix that OpenAI can cache.
+        
+        Returns:
+            str: Task prompt ready for GPT-4 API call
+        """
+        return TASK_PROMPT_TEMPLATE.format_map({'query': self.name})
+    
+    def _build_model_context(self):
+        """
+        Build the query-independent user message: model description,
+        available fields and model-specific examples.
+        
+        The text only depends on the model schema, so it is built once per
+        model (and language/user) and cached until the registry changes,
+        instead of walking fields_get() and formatting the field list on
+        every query.
+        
+        Returns:
+            str: Prompt sections shared by every query on this model
+        """
+        return cached_model_text(self.env, self.model_name, 'model_context', self._format_model_context)
+    
+    def _format_model_context(self):
+        """Format the sections returned by _build_model_context (uncached)."""
+        model_fields = cached_fields_get(self.env, self.model_name, FIELD_ATTRIBUTES)
+        _logger.debug("[LLM] Building context of %s (%s fields)", self.model_name, len(model_fields))
+        return MODEL_CONTEXT_TEMPLATE.format_map({
+            'model': self.model_name,
+            'description': self._get_model_description(),
+            'fields': self._get_field_info(model_fields),
+            'examples': self._get_model_examples(),
+        })
 
     def _get_field_info(self, model_fields):
         """
@@ -697,29 +2033,41 @@ Response:"""
         This method filters out:
         - Private fields (starting with _)
         - Computed fields (store=False)
+        - Audit and chatter fields (NOISE_FIELDS) and binary/technical types
         
         These restrictions ensure GPT-4 only sees fields that can be used in domain queries.
         
         Args:
-            model_fields: Dictionary from Model.fields_get()
+            model_fields: Dictionary from cached_fields_get()
             
+        Fields are grouped by type, one line per type ("char: name, email"),
+        and the label is only added when it says more than the field name
+        ("partner_id(Customer)"), which keeps the prompt compact.
+        
         Returns:
-            str: Formatted field list, max 50 fields (first 50 chars per line)
+            str: Formatted field list, max 50 fields
         """
-        fields_info = []
-        for field_name, field_data in model_fields.items():
-            if field_name.startswith('_'):
-                continue
-            
-            is_stored = field_data.get('store', True) is not False
-            if not is_stored:
-                continue
-            
-            field_type = field_data.get('type', 'unknown')
-            field_string = field_data.get('string', field_name)
-            fields_info.append(f"- {field_name} ({field_type}): {field_string}")
-        
-        return "\n".join(fields_info[:50])
+        useful_fields = (
+            (field_name, field_data) for field_name, field_data in model_fields.items()
+            if not field_name.startswith('_')
+            and field_name not in NOISE_FIELDS
+            and field_data.get('type') in USEFUL_FIELD_TYPES
+            and field_data.get('store', True) is not False
+        )
+        
+        fields_by_type = {}
+        for field_name, field_data in islice(useful_fields, 50):
+            field_type = field_data['type']
+            field_string = field_data.get('string') or field_name
+            humanized = field_name.removesuffix('_ids').removesuffix('_id').replace('_', ' ')
+            if field_string.lower() != humanized.lower():
+                field_name = f"{field_name}({field_string})"
+            fields_by_type.setdefault(field_type, []).append(field_name)
+        
+        return "\n".join(
+            f"{field_type}: {', '.join(names)}"
+            for field_type, names in fields_by_type.items()
+        )
     
     def _get_model_description(self):
         """
@@ -731,18 +2079,7 @@ Response:"""
         Returns:
             str: Description of the model (e.g., "Contacts, Customers, Suppliers, Companies")
         """
-        descriptions = {
-            'res.partner': 'Contacts, Customers, Suppliers, Companies',
-            'account.move': 'Invoices and Bills (posted documents)',
-            'product.product': 'Product Variants (specific SKUs with combinations)',
-            'product.template': 'Product Templates (prices, costs, inventory by template)',
-            'sale.order': 'Sales Orders',
-            'purchase.order': 'Purchase Orders',
-            'stock.move': 'Stock Movements and Inventory',
-            'crm.lead': 'CRM Leads and Opportunities',
-            'project.task': 'Project Tasks and Work Items',
-        }
-        return descriptions.get(self.model_name, self.model_name)
+        return _MODEL_DESCRIPTIONS.get(self.model_name, self.model_name)
     
     def _get_model_examples(self):
         """
@@ -758,66 +2095,18 @@ Response:"""
         Returns:
             str: Formatted examples for the current model
         """
-        examples = {
-            'res.partner': """
-- "Customers from Milan" → [('city', 'ilike', 'Milan'), ('customer_rank', '>', 0)]
-- "Suppliers" → [('supplier_rank', '>', 0)]
-- "Active contacts" → [('active', '=', True)]
-- "Inactive partners" → [('active', '=', False)]""",
-            'account.move': """
-- "Unpaid invoices" → [('state', '!=', 'posted'), ('payment_state', '=', 'not_paid')]
-- "Invoices from January 2025" → [('invoice_date', '>=', '2025-01-01'), ('invoice_date', '<', '2025-02-01')]
-- "Large invoices over 1000" → [('amount_total', '>', 1000)]""",
-            'product.product': """
-- "Variants with barcode starting with 123" → [('barcode', 'like', '123')]
-- "Active variants" → [('active', '=', True)]
-- "Variants with default_code starting with SKU" → [('default_code', 'like', 'SKU')]
-NOTE: For price/cost queries, use product.template model instead (prices are stored there)""",
-            'product.template': """
-IMPORTANT PRICE DISTINCTION:
-- list_price = SELLING PRICE (what customer pays) - for queries about "price", "prezzo", "cost to customer"
-- standard_price = INTERNAL COST (our cost) - only for "internal cost", "costo interno", "cost price"
-
-EXAMPLES:
-- "Products under 100 euros" → [('list_price', '<', 100)]
-- "Articles cheaper than 50" → [('list_price', '<', 50)]
-- "Products with selling price under 100" → [('list_price', '<', 100)]
-- "Products with internal cost > 50" → [('standard_price', '>', 50)]
-- "Products with our cost above 100" → [('standard_price', '>', 100)]
-- "Active products" → [('active', '=', True)]
-- "Low stock products" → [('qty_available', '<', 10), ('active', '=', True)]
-- "Electronics products" → [('categ_id.name', 'ilike', 'Electronics')]
-
-KEY RULE: If user mentions "price", "prezzo", "euro", "cost to customer" → ALWAYS use list_price
-KEY RULE: If user specifically mentions "internal cost", "costo interno", "our cost", "cost price" → use standard_price""",
-            'sale.order': """
-- "Draft orders" → [('state', '=', 'draft')]
-- "Confirmed sales from last month" → [('state', '=', 'sale')]
-- "Orders over 500" → [('amount_total', '>', 500)]""",
-            'purchase.order': """
-- "RFQ pending" → [('state', '=', 'draft')]
-- "Confirmed purchases" → [('state', 'in', ['purchase', 'done'])]""",
-            'stock.move': """
-- "In progress moves" → [('state', '=', 'confirmed')]
-- "Done moves" → [('state', '=', 'done')]""",
-            'crm.lead': """
-- "Open opportunities" → [('probability', '>', 0), ('probability', '<', 100)]
-- "Lost deals" → [('probability', '=', 0)]
-- "Won deals" → [('probability', '=', 100)]""",
-            'project.task': """
-- "Open tasks" → [('state', 'in', ['todo', 'in_progress'])]
-- "Completed tasks" → [('state', '=', 'done')]""",
-        }
-        return examples.get(self.model_name, "No specific examples available")
+        return _MODEL_EXAMPLES.get(self.model_name, "No specific examples available")
 
     def _parse_domain_response(self, response_text):
         """
         Extract and validate the Odoo domain from GPT-4 response.
         
         Process:
-        1. Remove markdown formatting (```, code fences)
-        2. Extract the list using regex
-        3. Parse using ast.literal_eval (safe)
+        1. Extract the first balanced [...] list in one scan (this also
+           skips markdown code fences around it)
+        2. Return an empty domain when no list was found
+        3. Parse with json.loads, or ast.literal_eval for Python literals (safe);
+           steps 1-3 are memoized per response text (_parse_domain_text)
         4. If parsing fails, attempt repair with fallback strategies
         5. Fix price field issues automatically
         6. Validate all fields exist in the model
@@ -831,41 +2120,27 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
         Raises:
             UserError: If domain cannot be parsed or validated
         """
-        import re
-        import ast
         try:
-            cleaned = response_text.strip()
-            _logger.warning(f"[PARSE] Original response (first 500 chars): {cleaned[:500]}")
-            
-            if cleaned.startswith('```'):
-                cleaned = re.sub(r'^```python\n?', '', cleaned)
-                cleaned = re.sub(r'^```\n?', '', cleaned)
-                cleaned = re.sub(r'```.*$', '', cleaned, flags=re.DOTALL).strip()
-                _logger.warning(f"[PARSE] After removing markdown: {cleaned[:500]}")
-            
-            match = re.search(r'\[.*\]', cleaned, re.DOTALL)
-            if match:
-                cleaned = match.group(0)
-                _logger.warning(f"[PARSE] Extracted list: {cleaned[:500]}")
-            else:
-                _logger.warning(f"[PARSE] No list found in response. Full response: {cleaned[:500]}")
-            
-            if not cleaned or cleaned == '[]':
-                _logger.warning(f"[PARSE] Empty domain returned (query: {self.name})")
-                return []
+            _logger.debug("[PARSE] Original response (first 500 chars): %.500s", response_text)
             
             try:
-                domain = ast.literal_eval(cleaned)
+                # A copy: _fix_price_fields rewrites clauses in place
+                domain = list(_parse_domain_text(response_text))
             except (ValueError, SyntaxError) as e:
-                _logger.warning(f"[PARSE] ast.literal_eval failed ({e}), attempting fallback repairs...")
-                domain = self._attempt_domain_repair(cleaned)
+                _logger.warning(f"[PARSE] Literal parsing failed ({e}), attempting fallback repairs...")
+                cleaned = response_text.strip()
+                extracted = _extract_list(cleaned)
+                domain = self._attempt_domain_repair(extracted if extracted is not None else cleaned)
+                if not isinstance(domain, list):
+                    raise ValueError(f"Response is not a list: {type(domain)}")
             
-            if not isinstance(domain, list):
-                raise ValueError(f"Response is not a list: {type(domain)}")
+            if not domain:
+                _logger.debug("[PARSE] Empty domain returned (query: %s)", self.name)
+                return []
             
             domain = self._fix_price_fields(domain)
             self._validate_domain_fields(domain)
-            _logger.warning(f"[PARSE] Successfully parsed domain: {domain}")
+            _logger.debug("[PARSE] Successfully parsed domain: %s", domain)
             return domain
         except UserError:
             raise
@@ -882,9 +2157,11 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
     
     def _validate_domain_fields(self, domain):
         """
-        Validate that all fields referenced in the domain exist and are stored (not computed).
+        Validate the domain structure and that all fields referenced exist and
+        are stored (not computed).
         
         This prevents errors like:
+        - Malformed elements or unknown operators, rejected before any SQL is built
         - Using a field that doesn't exist: Field "typo_name" does not exist
         - Using a computed field: Field "lst_price" is computed (not in database)
         
@@ -894,46 +2171,61 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
             domain: List of tuples representing the Odoo domain
             
         Raises:
-            UserError: If any field is invalid or computed
+            UserError: If the domain is malformed or any field is invalid or computed
         """
         if not domain:
             return
         
-        Model = self.env[self.model_name]
-        model_fields = Model.fields_get()
+        # Existence and storage are plain field attributes: no need for the
+        # translated fields_get() description here
+        model_fields = self.env[self.model_name]._fields
+        missing = []
+        computed = []
         
         for clause in domain:
-            if not isinstance(clause, (tuple, list)) or len(clause) < 3:
+            if isinstance(clause, str) and clause in DOMAIN_OPERATORS:
                 continue
+            if not isinstance(clause, (tuple, list)) or len(clause) != 3:
+                raise UserError(_(
+                    'The AI generated an invalid search condition: %s\n\n'
+                    'Try rephrasing your question.'
+                ) % str(clause)[:80])
+            if not isinstance(clause[1], str) or clause[1] not in CLAUSE_OPERATORS:
+                raise UserError(_(
+                    'The AI used an unsupported operator "%s".\n\n'
+                    'Try rephrasing your question.'
+                ) % str(clause[1])[:20])
             
             field_name = clause[0]
             
-            if field_name in ('|', '&', '!'):
+            # Skip constant leaves such as (1, '=', 1)
+            if not isinstance(field_name, str):
                 continue
             
-            base_field = field_name.split('.')[0]
+            base_field = field_name.split('.', 1)[0]
             
             if base_field not in model_fields:
-                stored_fields = self._get_available_stored_fields()
-                error_msg = _(
-                    'The field "%s" does not exist in this module.\n\n'
-                    'AI may have misunderstood your query.\n\n'
-                    'Available fields:\n%s\n\n'
-                    'Try rephrasing your question or check the Debug Info tab for details.'
-                ) % (base_field, stored_fields[:200])
-                raise UserError(error_msg)
-            
-            field_data = model_fields[base_field]
-            if field_data.get('store') is False:
-                stored_fields = self._get_available_stored_fields()
-                error_msg = _(
-                    'The field "%s" is calculated, not stored in database.\n\n'
-                    'This is a limitation of Odoo - use stored fields instead.\n\n'
-                    'Try a different search or use one of these fields:\n%s'
-                ) % (base_field, stored_fields[:200])
-                raise UserError(error_msg)
-            
-            _logger.warning(f"[VALIDATE] Field '{base_field}' is valid and stored")
+                missing.append(base_field)
+            elif not model_fields[base_field].store:
+                computed.append(base_field)
+        
+        # All invalid fields are reported at once, with a single field listing
+        if missing:
+            error_msg = _(
+                'The field "%s" does not exist in this module.\n\n'
+                'AI may have misunderstood your query.\n\n'
+                'Available fields:\n%s\n\n'
+                'Try rephrasing your question or check the Debug Info tab for details.'
+            ) % ('", "'.join(dict.fromkeys(missing)), self._get_available_stored_fields()[:200])
+            raise UserError(error_msg)
+        
+        if computed:
+            error_msg = _(
+                'The field "%s" is calculated, not stored in database.\n\n'
+                'This is a limitation of Odoo - use stored fields instead.\n\n'
+                'Try a different search or use one of these fields:\n%s'
+            ) % ('", "'.join(dict.fromkeys(computed)), self._get_available_stored_fields()[:200])
+            raise UserError(error_msg)
     
     def _fix_price_fields(self, domain):
         """
@@ -960,9 +2252,17 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
         if not domain or self.model_name not in ('product.template', 'product.product'):
             return domain
         
-        query_lower = self.name.lower()
-        has_price_keywords = any(word in query_lower for word in ['prezzo', 'price', 'euro', '€', 'under', 'sopra', 'above', 'below', 'less', 'more', 'cheaper', 'expensive'])
-        has_cost_keywords = any(word in query_lower for word in ['costo interno', 'internal cost', 'cost price', 'nostra cost', 'our cost'])
+        # Most domains don't touch price fields: skip the keyword scans entirely.
+        # Malformed clauses (e.g. a list as field name) are left to _validate_domain_fields
+        if not any(
+            isinstance(clause, (tuple, list)) and clause
+            and isinstance(clause[0], str) and clause[0] in self.PRICE_FIELDS
+            for clause in domain
+        ):
+            return domain
+        
+        has_price_keywords = bool(self.PRICE_KEYWORDS_RE.search(self.name))
+        has_cost_keywords = has_price_keywords and bool(self.COST_KEYWORDS_RE.search(self.name))
         
         for i, clause in enumerate(domain):
             if not isinstance(clause, (tuple, list)) or len(clause) < 3:
@@ -1000,17 +2300,7 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
         Returns:
             str: Comma-separated list of up to 20 stored field names
         """
-        Model = self.env[self.model_name]
-        model_fields = Model.fields_get()
-        
-        stored = []
-        for field_name, field_data in model_fields.items():
-            if field_name.startswith('_'):
-                continue
-            if field_data.get('store') is not False:
-                stored.append(field_name)
-        
-        return ', '.join(sorted(stored)[:20])
+        return ', '.join(cached_stored_field_names(self.env, self.model_name)[:20])
     
     def _attempt_domain_repair(self, domain_str):
         """
@@ -1021,10 +2311,9 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
         - Malformed boolean/None values
         
         This method tries:
-        1. Common string replacements (quote fixes, boolean/None normalization)
-        2. ast.literal_eval (safe, no code execution)
-        3. eval as last resort (if literal_eval fails)
-        4. Return empty domain [] if all repairs fail
+        1. Quote fixes, then json.loads / ast.literal_eval (safe, no code execution)
+        2. Removing trailing commas before ] or ), then parsing again
+        3. Return empty domain [] if all repairs fail
         
         Args:
             domain_str: String that should be a Python list but has syntax errors
@@ -1032,26 +2321,18 @@ KEY RULE: If user specifically mentions "internal cost", "costo interno", "our c
         Returns:
             list: Repaired domain, or [] if cannot be fixed
         """
-        import ast
-        repairs = [
-            (r"'\"", "'"),
-            (r"\"'", "'"),
-            (r"True", "True"),
-            (r"False", "False"),
-            (r"None", "None"),
-        ]
+        domain_str = _MIXED_QUOTES_RE.sub("'", domain_str)
         
-        for pattern, replacement in repairs:
-            domain_str = domain_str.replace(pattern, replacement)
+        try:
+            return _literal_domain(domain_str)
+        except (ValueError, SyntaxError):
+            pass
         
         try:
-            return ast.literal_eval(domain_str)
-        except:
-            try:
-                return eval(domain_str)
-            except:
-                _logger.error(f"[REPAIR] Failed to repair domain: {domain_str[:200]}")
-                return []
+            return _literal_domain(_TRAILING_COMMA_RE.sub(r'\1', domain_str))
+        except (ValueError, SyntaxError):
+            _logger.error(f"[REPAIR] Failed to repair domain: {domain_str[:200]}")
+            return []
 
 
 class SearchResult(models.Model):
@@ -1063,7 +2344,8 @@ class SearchResult(models.Model):
     This model serves as a Many2one target for SearchQuery, allowing:
     - Easy access to results from the UI
     - Audit trail of what records were found
-    - Support for large result sets (up to 50 results per query)
+    - Support for large result sets (up to MAX_RESULTS lines per query;
+      the query's results_count holds the full total)
     
     Fields store the original record ID, display name, and model for reference,
     since we don't want to create foreign key constraints to arbitrary models.
@@ -1085,3 +2367,7 @@ class SearchResult(models.Model):
     # Model name of the found record (e.g., "account.move", "res.partner")
     # Stored as string so we can reference any model type
     model = fields.Char('Model', required=True)
+    
+    # Results are always read per query in _order: one index range scan instead of
+    # a full table scan (also serves the cascade delete and query_id lookups)
+    _query_id_id_idx = models.Index('(query_id, id DESC)')
@@ -0,0 +1,326 @@
+import base64
+import hashlib
+import logging
+import math
+import threading
+from array import array
+from datetime import timedelta
+from psycopg2 import IntegrityError
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Per-process index of normalized query embeddings, keyed by (dbname, model_name)
+# Each entry holds the highest cache id already loaded, the (id, vector, create_date)
+# tuples and, when numpy is available, the same vectors as one float32 matrix,
+# so a lookup only reads rows created since the previous lookup (and rebuilds
+# the entry when rows were deleted, e.g. by the autovacuum in another worker)
+_vector_index = {}
+_vector_index_lock = threading.Lock()
+
+# Maximum number of cached responses kept by the autovacuum (least recently used go first)
+CACHE_MAX_ENTRIES = 10000
+
+# Without numpy, the semantic lookup scores only this many of the most recent
+# embeddings of a model, so a pure-Python scan stays well under the LLM latency
+VECTOR_SCAN_LIMIT = 2000
+
+# Default lifetime of a cached response, in days (override with the
+# ovunque.cache_ttl_days system parameter, 0 = never expire)
+CACHE_TTL_DAYS = 7
+
+
+def _normalize(vector):
+    """Scale a vector to unit length so cosine similarity becomes a dot product."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return list(vector)
+    return [x / norm for x in vector]
+
+
+def _query_hash(query_text):
+    """Content address of a query text, used to reuse its embedding."""
+    return hashlib.sha256(query_text.strip().encode()).hexdigest()
+
+
+def _exact_key(model_name, query_text):
+    """Key of the exact-match lookup: model plus case/whitespace-normalized query."""
+    normalized = ' '.join(query_text.lower().split())
+    return hashlib.sha256(f"{model_name}|{normalized}".encode()).hexdigest()
+
+
+def _pack_vector(vector):
+    """Encode a float vector as base64 float32 bytes for a Binary column."""
+    return base64.b64encode(array('f', vector).tobytes())
+
+
+def _unpack_vector(data):
+    """Decode a Binary column value produced by _pack_vector."""
+    vector = array('f')
+    vector.frombytes(base64.b64decode(data))
+    return vector
+
+
+class SearchQueryCache(models.Model):
+    """
+    LLM Response Cache
+
+    Stores the raw LLM response of a successfully parsed query. A query asked
+    again on the same model (ignoring case and spacing) reuses the stored
+    response in every worker and after restarts, without calling OpenAI.
+
+    When the semantic cache is enabled, the embedding of the query text is
+    stored as well. A new query on the same model whose
+    embedding is close enough (cosine similarity >= threshold) reuses the
+    stored response instead of calling the chat completion API, so paraphrases
+    like "clienti di Roma" / "customers based in Rome" cost one embedding call.
+
+    Responses expire after ovunque.cache_ttl_days (CACHE_TTL_DAYS by default),
+    so prompt or data changes are eventually picked up without a manual purge.
+
+    The semantic cache is opt-in: it is only consulted when the system parameter
+    ovunque.semantic_cache_threshold is set (e.g. 0.92). Keep the threshold
+    high, since queries differing only by a value ("over 100" vs "over 1000")
+    can still be very similar.
+    """
+    _name = 'search.query.cache'
+    _description = 'Natural Language Search LLM Cache'
+    _order = 'id desc'
+
+    # Odoo model the cached response was generated for (e.g., "res.partner")
+    model_name = fields.Char('Model', required=True, index=True)
+
+    # Natural language query that produced the response
+    query_text = fields.Char('Query Text', required=True)
+
+    # SHA256 of the query text, so an identical query never needs a new embedding
+    query_hash = fields.Char('Query Hash', index=True)
+
+    # SHA256 of model name + normalized query text, for exact-match lookups
+    key_hash = fields.Char('Lookup Key')
+
+    # Raw LLM response, re-parsed and re-validated on every hit
+    response_text = fields.Text('Raw LLM Response', required=True)
+
+    # Unit-length query embedding, stored as float32 bytes (semantic cache only)
+    embedding = fields.Binary('Embedding', attachment=False)
+
+    # Number of times the response was reused, and when it was last reused
+    hit_count = fields.Integer('Hits', default=0)
+    last_used = fields.Datetime('Last Used', default=fields.Datetime.now)
+
+    # One response per (model, normalized query); also serves the exact-match lookup
+    _model_key_hash_uniq = models.UniqueIndex('(model_name, key_hash) WHERE key_hash IS NOT NULL')
+
+    @api.model
+    def _get_ttl_cutoff(self):
+        """
+        Return the creation date before which cached responses are expired.
+
+        Returns:
+            datetime: Cutoff, or None when ovunque.cache_ttl_days is 0
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('ovunque.cache_ttl_days')
+        try:
+            days = float(value) if value else CACHE_TTL_DAYS
+        except ValueError:
+            _logger.warning(f"[CACHE] Invalid ovunque.cache_ttl_days: {value}")
+            days = CACHE_TTL_DAYS
+        if days <= 0:
+            return None
+        return fields.Datetime.now() - timedelta(days=days)
+
+    @api.model
+    def _lookup_exact(self, model_name, query_text, include_expired=False):
+        """
+        Find the cached response of the same query on the same model.
+
+        Args:
+            model_name (str): Odoo model the query targets
+            query_text (str): Natural language query
+            include_expired (bool): Also return a response older than the TTL
+
+        Returns:
+            search.query.cache: Matching record, or an empty recordset
+        """
+        domain = [('model_name', '=', model_name), ('key_hash', '=', _exact_key(model_name, query_text))]
+        cutoff = None if include_expired else self._get_ttl_cutoff()
+        if cutoff:
+            domain.append(('create_date', '>=', cutoff))
+        return self.sudo().search(domain, limit=1)
+
+    def _mark_used(self):
+        """Record a cache hit, for the hit statistics and LRU eviction."""
+        for cache in self.sudo():
+            cache.write({
+                'hit_count': cache.hit_count + 1,
+                'last_used': fields.Datetime.now(),
+            })
+
+    @api.model
+    def _lookup_similar(self, model_name, embedding, threshold):
+        """
+        Find the cached response whose query embedding is closest to embedding.
+
+        Args:
+            model_name (str): Odoo model the new query targets
+            embedding (list): Embedding of the new query text
+            threshold (float): Minimum cosine similarity for a hit
+
+        Returns:
+            search.query.cache: Best matching record, or an empty recordset
+        """
+        query_vector = _normalize(embedding)
+        cutoff = self._get_ttl_cutoff()
+        entries, matrix = self._get_vector_index(model_name)
+        if matrix is not None:
+            scores = matrix @ numpy.asarray(query_vector, dtype=numpy.float32)
+            scored = ((float(scores[i]), entries[i]) for i in numpy.flatnonzero(scores >= threshold))
+        else:
+            scored = (
+                (sum(a * b for a, b in zip(query_vector, entry[1])), entry)
+                for entry in entries[-VECTOR_SCAN_LIMIT:]
+            )
+        # Expired responses are skipped here, so a valid next-best match can still hit
+        candidates = sorted(
+            ((score, entry[0]) for score, entry in scored
+             if score >= threshold and not (cutoff and entry[2] < cutoff)),
+            reverse=True,
+        )
+
+        for score, cache_id in candidates:
+            cache = self.sudo().browse(cache_id).exists()
+            if cache:
+                _logger.debug("[CACHE] Semantic hit on %s (similarity %.3f)", model_name, score)
+                return cache
+            # Deleted by another worker since it was indexed: try the next best match
+            self._drop_from_vector_index(model_name, cache_id)
+        return self.browse()
+
+    @api.model
+    def _get_cached_embedding(self, query_text):
+        """
+        Return the stored embedding of an identical query text, if any.
+
+        Embeddings depend only on the text, so a row cached for any model
+        can be reused.
+
+        Returns:
+            list: Unit-length embedding, or None when the text was never embedded
+        """
+        rows = self.sudo().search_read(
+            [('query_hash', '=', _query_hash(query_text)), ('embedding', '!=', False)],
+            ['embedding'],
+            limit=1,
+        )
+        if not rows:
+            return None
+        return list(_unpack_vector(rows[0]['embedding']))
+
+    @api.model
+    def _store_response(self, model_name, query_text, embedding, response_text):
+        """
+        Persist a successfully parsed response.
+
+        Args:
+            model_name (str): Odoo model the query targets
+            query_text (str): Natural language query
+            embedding (list): Query embedding, or None when the semantic
+                cache is disabled
+            response_text (str): Raw LLM response
+
+        Returns:
+            search.query.cache: The stored row (an existing one if the same
+            query was already cached)
+        """
+        existing = self._lookup_exact(model_name, query_text, include_expired=True)
+        if existing:
+            cutoff = self._get_ttl_cutoff()
+            if not cutoff or existing.create_date >= cutoff:
+                return existing
+            # Expired: replace it, so the new row gets a fresh creation date
+            existing.unlink()
+        try:
+            # Another worker may store the same query concurrently: like
+            # INSERT ... ON CONFLICT DO NOTHING, keep the row that won
+            with self.env.cr.savepoint():
+                return self.sudo().create({
+                    'model_name': model_name,
+                    'query_text': query_text,
+                    'query_hash': _query_hash(query_text),
+                    'key_hash': _exact_key(model_name, query_text),
+                    'response_text': response_text,
+                    'embedding': _pack_vector(_normalize(embedding)) if embedding is not None else False,
+                })
+        except IntegrityError:
+            return self._lookup_exact(model_name, query_text, include_expired=True)
+
+    @api.autovacuum
+    def _gc_cache_entries(self):
+        """Drop expired responses and keep only the CACHE_MAX_ENTRIES most recently used."""
+        cutoff = self._get_ttl_cutoff()
+        if cutoff:
+            expired = self.sudo().search([('create_date', '<', cutoff)])
+            if expired:
+                _logger.info("Removing %d expired LLM cache entries", len(expired))
+                expired.unlink()
+        stale = self.sudo().search([], order='last_used desc, id desc', offset=CACHE_MAX_ENTRIES)
+        if stale:
+            _logger.info("Removing %d least recently used LLM cache entries", len(stale))
+            stale.unlink()
+
+    @api.model
+    def _get_vector_index(self, model_name):
+        """
+        Return the embeddings cached in this process for model_name.
+
+        Rows created since the last call (by any worker) are read and appended,
+        so the full embedding matrix is only decoded once per process. When
+        indexed rows have been deleted since (expired, evicted or replaced),
+        the index is rebuilt, so it never holds more than the live rows.
+
+        Returns:
+            tuple: (id, vector, create_date) entries, and their vectors as a
+            float32 matrix (None when numpy is not installed)
+        """
+        key = (self.env.cr.dbname, model_name)
+        with _vector_index_lock:
+            index = _vector_index.setdefault(key, {'last_id': 0, 'entries': [], 'matrix': None})
+            last_id = index['last_id']
+
+        domain = [('model_name', '=', model_name), ('embedding', '!=', False)]
+        if last_id and self.sudo().search_count(domain + [('id', '<=', last_id)]) != len(index['entries']):
+            _logger.debug("[CACHE] Rebuilding the embedding index of %s", model_name)
+            with _vector_index_lock:
+                index = _vector_index[key] = {'last_id': 0, 'entries': [], 'matrix': None}
+            last_id = 0
+
+        new_rows = self.sudo().search_read(
+            domain + [('id', '>', last_id)],
+            ['embedding', 'create_date'],
+            order='id asc',
+        )
+
+        with _vector_index_lock:
+            for row in new_rows:
+                if row['id'] > index['last_id']:
+                    index['entries'].append((row['id'], _unpack_vector(row['embedding']), row['create_date']))
+                    index['last_id'] = row['id']
+                    index['matrix'] = None
+            if numpy is not None and index['matrix'] is None and index['entries']:
+                index['matrix'] = numpy.array([entry[1] for entry in index['entries']], dtype=numpy.float32)
+            return list(index['entries']), index['matrix']
+
+    @api.model
+    def _drop_from_vector_index(self, model_name, cache_id):
+        """Remove a deleted row from this process's embedding index of model_name."""
+        with _vector_index_lock:
+            index = _vector_index.get((self.env.cr.dbname, model_name))
+            if index:
+                index['entries'] = [entry for entry in index['entries'] if entry[0] != cache_id]
+                index['matrix'] = None
@@ -0,0 +1,33 @@
+from odoo import models, fields
+
+
+class SearchQueryRateLimit(models.Model):
+    """
+    Shared LLM Rate Limiter State
+
+    One row per database-wide token bucket (see _SharedTokenBucket in
+    search_query.py), read and updated by every worker under
+    SELECT ... FOR UPDATE. The rows are internal state rewritten on every
+    OpenAI call: they have no views, are read-only for administrators, and
+    their keys (currently only 'ovunque.llm_rpm_state') are reserved for
+    the limiter. Configure the limit itself with ovunque.llm_rpm.
+    """
+    _name = 'search.query.rate.limit'
+    _description = 'Natural Language Search Rate Limiter State'
+    # Rewritten on every acquire: the audit columns would only add write load
+    _log_access = False
+
+    # Reserved bucket key (e.g., "ovunque.llm_rpm_state")
+    name = fields.Char('Key', required=True, readonly=True)
+
+    # Wall-clock time (seconds) of the last refill
+    updated = fields.Float('Updated', readonly=True)
+
+    # Tokens left after the last refill
+    tokens = fields.Float('Tokens', readonly=True)
+
+    # Wall-clock time (seconds) until which every acquire waits (429 Retry-After)
+    blocked_until = fields.Float('Blocked Until', readonly=True)
+
+    # One row per bucket; also the target of the INSERT ... ON CONFLICT
+    _name_uniq = models.UniqueIndex('(name)')
@@ -0,0 +1,34 @@
+from odoo.tests import TransactionCase, tagged
+
+from ..models.search_query import _FAST_PATHS, _MODEL_EXAMPLES, _parse_domain_text
+
+
+@tagged('post_install', '-at_install')
+class TestFastPaths(TransactionCase):
+    """Canonical queries must return the same records with or without the LLM."""
+
+    def _prompt_example(self, model_name, query_text):
+        """Return the domain the prompt of model_name teaches for query_text."""
+        for line in _MODEL_EXAMPLES[model_name].splitlines():
+            if line.startswith(f'- "{query_text}" →'):
+                return list(_parse_domain_text(line.split('→', 1)[1]))
+        self.fail(f'No prompt example for "{query_text}" on {model_name}')
+
+    def _fast_path(self, model_name, query_text):
+        """Return the predefined domain of query_text on model_name."""
+        for pattern, domain in _FAST_PATHS[model_name]:
+            if pattern.fullmatch(query_text.lower()):
+                return list(domain)
+        self.fail(f'No fast path for "{query_text}" on {model_name}')
+
+    def test_unpaid_invoices_matches_prompt_example(self):
+        expected = self._prompt_example('account.move', 'Unpaid invoices')
+        for query_text in ('Unpaid invoices', 'unpaid customer invoices', 'fatture non pagate'):
+            with self.subTest(query=query_text):
+                self.assertEqual(self._fast_path('account.move', query_text), expected)
+
+    def test_match_fast_path_returns_prompt_domain(self):
+        if 'account.move' not in self.env:
+            self.skipTest('Accounting is not installed')
+        query = self.env['search.query'].new({'name': 'Fatture non pagate?', 'model_name': 'account.move'})
+        self.assertEqual(query._match_fast_path(), self._prompt_example('account.move', 'Unpaid invoices'))
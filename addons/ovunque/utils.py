@@ -3,7 +3,7 @@ Utility functions for Ovunque module
 
 This module provides helper functions for:
 - Configuring OpenAI API keys
-- Extracting model field information
+- Extracting model field information (with a per-process fields_get cache)
 - Parsing and formatting search results
 - Validating Odoo domains
 - Common search pattern examples
@@ -12,10 +12,18 @@ These functions are used by both the models and controllers.
 """
 
 import logging
+import threading
+from collections import OrderedDict
 from odoo import api, fields
 
 _logger = logging.getLogger(__name__)
 
+# Maximum number of fields_get() results kept by cached_fields_get()
+FIELDS_GET_CACHE_SIZE = 128
+
+_fields_get_cache = OrderedDict()
+_fields_get_cache_lock = threading.Lock()
+
 
 def setup_api_key(env, api_key):
     """
@@ -44,6 +52,116 @@ def setup_api_key(env, api_key):
         return False
 
 
+def cached_fields_get(env, model_name, attributes=None):
+    """
+    Return Model.fields_get() for model_name, memoized per process.
+    
+    fields_get() walks every field of the model and translates labels, which
+    is expensive for wide models (res.partner, account.move). The schema only
+    changes when modules are installed or upgraded, which bumps the registry
+    sequence, so results are keyed by database, registry sequence, model,
+    language and user (field visibility depends on the user's groups).
+    
+    Args:
+        env: Odoo environment
+        model_name: Full model name (e.g., "res.partner")
+        attributes: Optional list of field attributes to fetch
+    
+    Returns:
+        dict: fields_get() result. Shared between callers - do not modify it.
+    
+    Raises:
+        KeyError: If the model is not installed
+    """
+    key = (
+        env.cr.dbname,
+        env.registry.registry_sequence,
+        model_name,
+        env.lang,
+        env.uid,
+        tuple(attributes) if attributes else None,
+    )
+    return _fields_cache_lookup(key, lambda: env[model_name].fields_get(attributes=attributes))
+
+
+def cached_stored_field_names(env, model_name):
+    """
+    Return the sorted names of the stored, public fields of model_name.
+    
+    Built from cached_fields_get() and memoized alongside it, so error
+    messages listing the available fields don't rescan the schema. Keyed
+    by user like fields_get(), whose output depends on field access rights.
+    
+    Args:
+        env: Odoo environment
+        model_name: Full model name (e.g., "res.partner")
+    
+    Returns:
+        tuple: Sorted stored field names
+    """
+    key = (
+        env.cr.dbname,
+        env.registry.registry_sequence,
+        model_name,
+        env.uid,
+        'stored_field_names',
+    )
+    
+    def build():
+        model_fields = cached_fields_get(env, model_name, ['store'])
+        return tuple(sorted(
+            name for name, data in model_fields.items()
+            if not name.startswith('_') and data.get('store') is not False
+        ))
+    
+    return _fields_cache_lookup(key, build)
+
+
+def cached_model_text(env, model_name, name, build):
+    """
+    Return a value derived from the schema of model_name, memoized per process.
+    
+    Used for prompt sections built from fields_get() (field lists, model
+    context): they are keyed like cached_fields_get(), so they are rebuilt
+    after a module install or upgrade and per language and user.
+    
+    Args:
+        env: Odoo environment
+        model_name: Full model name (e.g., "res.partner")
+        name: Identifier of the derived value (e.g., "model_context")
+        build: Callable without arguments computing the value on a miss
+    
+    Returns:
+        The cached or freshly built value
+    """
+    key = (
+        env.cr.dbname,
+        env.registry.registry_sequence,
+        model_name,
+        env.lang,
+        env.uid,
+        name,
+    )
+    return _fields_cache_lookup(key, build)
+
+
+def _fields_cache_lookup(key, build):
+    """Return the cached value for key, calling build() on a miss (LRU)."""
+    with _fields_get_cache_lock:
+        value = _fields_get_cache.get(key)
+        if value is not None:
+            _fields_get_cache.move_to_end(key)
+            return value
+    
+    value = build()
+    
+    with _fields_get_cache_lock:
+        _fields_get_cache[key] = value
+        while len(_fields_get_cache) > FIELDS_GET_CACHE_SIZE:
+            _fields_get_cache.popitem(last=False)
+    return value
+
+
 def get_model_fields_for_llm(env, model_name, limit=30):
     """
     Extract model fields and format them as LLM-readable text.